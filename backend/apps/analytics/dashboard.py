@@ -0,0 +1,76 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Avg, Sum
+from django.utils import timezone
+
+class DashboardSnapshot:
+    """Precomputed dashboard analytics kept in the cache with an ETag"""
+    
+    CACHE_KEY = 'analytics:dashboard_snapshot'
+    
+    @property
+    def timeout(self):
+        return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 900)
+    
+    def get(self):
+        """Return the cached snapshot, building it on a miss"""
+        snapshot = cache.get(self.CACHE_KEY)
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+    
+    def refresh(self):
+        """Recompute the snapshot and store it in the cache"""
+        data = self.build()
+        payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+        snapshot = {
+            'data': data,
+            'etag': hashlib.md5(payload.encode()).hexdigest()
+        }
+        cache.set(self.CACHE_KEY, snapshot, self.timeout)
+        return snapshot
+    
+    def invalidate(self):
+        cache.delete(self.CACHE_KEY)
+    
+    def build(self):
+        """Get comprehensive analytics for dashboard"""
+        from apps.students.models import Student, Assessment, DailyAttendanceRollup
+        
+        # Overall statistics
+        total_students = Student.objects.count()
+        
+        # Risk distribution
+        risk_distribution = Student.objects.values('current_risk_level').annotate(
+            count=Count('id')
+        ).order_by('current_risk_level')
+        
+        # Attendance trends (last 30 days)
+        thirty_days_ago = timezone.now().date() - timedelta(days=30)
+        recent_attendance = DailyAttendanceRollup.objects.filter(
+            date__gte=thirty_days_ago
+        ).values('date').annotate(
+            present=Sum('present'),
+            absent=Sum('absent')
+        ).order_by('date')
+        
+        # Academic performance trends
+        performance_trends = Assessment.objects.filter(
+            date_conducted__gte=thirty_days_ago
+        ).values('subject__name').annotate(
+            avg_percentage=Avg('obtained_marks')
+        ).order_by('subject__name')
+        
+        return {
+            'total_students': total_students,
+            'risk_distribution': list(risk_distribution),
+            'attendance_trends': list(recent_attendance),
+            'performance_trends': list(performance_trends),
+            'last_updated': timezone.now()
+        }
+
+dashboard_snapshot = DashboardSnapshot()
@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from apps.students.models import Student
+from .ml_models import DropoutPredictor, calculate_age
+
+# Label column values: outcome still unknown, graduated, dropped out
+LABEL_UNKNOWN = -1
+LABELS = {'graduated': 0, 'dropped_out': 1}
+
+class FeatureSnapshot:
+    """A dated, memory-mapped snapshot of per-student model features"""
+    
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        
+        self.features = np.load(os.path.join(path, 'features.npy'), mmap_mode='r')
+        self.labels = np.load(os.path.join(path, 'labels.npy'), mmap_mode='r')
+        self.student_ids = np.load(os.path.join(path, 'student_ids.npy'), mmap_mode='r')
+        self.roll_numbers = np.load(os.path.join(path, 'roll_numbers.npy'), mmap_mode='r')
+        self._index = None
+    
+    def __len__(self):
+        return self.features.shape[0]
+    
+    @property
+    def feature_columns(self):
+        return self.meta['feature_columns']
+    
+    def row_for(self, roll_number):
+        """Feature row (a read-only view) for a roll number"""
+        if self._index is None:
+            self._index = {str(roll): i for i, roll in enumerate(self.roll_numbers)}
+        return self.features[self._index[roll_number]]
+    
+    def training_set(self):
+        """Feature matrix and labels for students with a known outcome"""
+        labelled = self.labels != LABEL_UNKNOWN
+        return self.features[labelled], np.asarray(self.labels[labelled])
+
+class FeatureStore:
+    """Write and read dated feature snapshots under FEATURE_STORE_DIR"""
+    
+    def __init__(self, base_dir=None, chunk_size=None):
+        self.base_dir = str(base_dir or getattr(
+            settings, 'FEATURE_STORE_DIR', os.path.join(settings.BASE_DIR, 'feature_store')
+        ))
+        self.chunk_size = chunk_size or getattr(settings, 'TRAINING_CHUNK_SIZE', 2000)
+    
+    def snapshot_dates(self):
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.base_dir)
+            if os.path.exists(os.path.join(self.base_dir, name, 'meta.json'))
+        )
+    
+    def load(self, snapshot_date=None):
+        """Open a snapshot, the latest one by default"""
+        if snapshot_date is None:
+            dates = self.snapshot_dates()
+            if not dates:
+                raise FileNotFoundError(f"No feature snapshots in {self.base_dir}")
+            snapshot_date = dates[-1]
+        
+        return FeatureSnapshot(os.path.join(self.base_dir, str(snapshot_date)))
+    
+    def write_snapshot(self, snapshot_date=None):
+        """Write today's features for every student as columnar .npy files"""
+        snapshot_date = str(snapshot_date or date.today())
+        feature_columns = DropoutPredictor().feature_columns
+        
+        students = Student.objects.order_by('id')
+        n_students = students.count()
+        
+        os.makedirs(self.base_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix=f'.{snapshot_date}-', dir=self.base_dir)
+        
+        try:
+            features = np.lib.format.open_memmap(
+                os.path.join(work_dir, 'features.npy'), mode='w+',
+                dtype=np.float64, shape=(n_students, len(feature_columns))
+            )
+            labels = np.full(n_students, LABEL_UNKNOWN, dtype=np.int8)
+            student_ids = np.zeros(n_students, dtype=np.int64)
+            roll_numbers = np.empty(n_students, dtype='<U20')
+            
+            rows = students.values_list(
+                'id',
+                'roll_number',
+                'enrollment_status',
+                'user__profile__date_of_birth',
+                'studentanalytics__overall_attendance_percentage',
+                'studentanalytics__overall_gpa',
+                'studentanalytics__consecutive_absences',
+                'studentanalytics__failing_subjects_count',
+                'studentanalytics__late_submissions',
+                'studentanalytics__overdue_payments'
+            ).iterator(chunk_size=self.chunk_size)
+            
+            i = 0
+            for (student_id, roll_number, enrollment_status, birth_date,
+                 attendance, gpa, absences, failing, late, overdue) in rows:
+                if i >= n_students:
+                    break
+                
+                # Same feature order and defaults as MLService._build_features
+                features[i] = [
+                    attendance or 0,
+                    gpa or 0,
+                    absences or 0,
+                    failing or 0,
+                    late or 0,
+                    overdue or 0,
+                    calculate_age(birth_date),
+                    2,  # Default parent education level
+                    2   # Default family income bracket
+                ]
+                labels[i] = LABELS.get(enrollment_status, LABEL_UNKNOWN)
+                student_ids[i] = student_id
+                roll_numbers[i] = roll_number
+                i += 1
+            
+            features.flush()
+            del features
+            
+            np.save(os.path.join(work_dir, 'labels.npy'), labels[:i])
+            np.save(os.path.join(work_dir, 'student_ids.npy'), student_ids[:i])
+            np.save(os.path.join(work_dir, 'roll_numbers.npy'), roll_numbers[:i])
+            if i < n_students:
+                # Students removed between the count and the scan
+                trimmed = np.load(os.path.join(work_dir, 'features.npy'))[:i]
+                np.save(os.path.join(work_dir, 'features.npy'), trimmed)
+            
+            with open(os.path.join(work_dir, 'meta.json'), 'w') as f:
+                json.dump({
+                    'snapshot_date': snapshot_date,
+                    'created_at': timezone.now().isoformat(),
+                    'feature_columns': feature_columns,
+                    'rows': i
+                }, f)
+            
+            # Replace any earlier snapshot for the same date in one rename
+            target = os.path.join(self.base_dir, snapshot_date)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.rename(work_dir, target)
+        
+        except Exception:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+        
+        return self.load(snapshot_date)
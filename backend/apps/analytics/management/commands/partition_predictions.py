@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.analytics import partitions
+
+class Command(BaseCommand):
+    help = 'Partition dropout prediction history by month (PostgreSQL only)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Rebuild the existing history table as a partitioned table'
+        )
+        parser.add_argument('--months-ahead', type=int, default=3)
+    
+    def handle(self, *args, **options):
+        if not partitions.is_supported():
+            raise CommandError('Prediction history partitioning requires PostgreSQL')
+        
+        if not partitions.is_partitioned():
+            if not options['convert']:
+                raise CommandError('Prediction history is not partitioned yet; run with --convert')
+            partitions.convert_to_partitioned(options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS('Converted prediction history to monthly partitions'))
+        
+        created = partitions.ensure_partitions(options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Partitions ready through {created[-1]:%Y-%m}"
+        ))
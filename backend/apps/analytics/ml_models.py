@@ -1,17 +1,53 @@
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+import hashlib
 import joblib
 import os
+import threading
+import time
+from joblib import Parallel, delayed
 from django.conf import settings
+from django.db import transaction
+from .tree_inference import FlatTreeEnsemble, UnsupportedModelError
+
+def calculate_age(birth_date):
+    """Calculate age from birth date"""
+    from datetime import date
+    if birth_date:
+        today = date.today()
+        return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+    return 18  # Default age
+
+def _fit_and_score(estimator, X, y, train_idx, test_idx):
+    """Fit one estimator on the given rows and score it on the held-out rows"""
+    started = time.perf_counter()
+    estimator.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - started
+    
+    score = None
+    if test_idx is not None:
+        score = estimator.score(X[test_idx], y[test_idx])
+    
+    return estimator, score, fit_seconds
 
 class DropoutPredictor:
+    HIGH_RISK_THRESHOLD = 0.7
+    MEDIUM_RISK_THRESHOLD = 0.4
+    ARTIFACT_FORMAT_VERSION = 2
+    
     def __init__(self):
-        self.model = None
+        self._model = None
+        self._model_path = None
         self.scaler = StandardScaler()
+        self.metrics = {}
+        self.load_seconds = None
+        self.inference = None
+        self._explainer = None
         self.label_encoders = {}
         self.feature_columns = [
             'attendance_percentage',
@@ -25,6 +61,22 @@ class DropoutPredictor:
             'family_income_bracket'
         ]
     
+    @property
+    def model(self):
+        """The sklearn estimator, unpickled from its own file on first use"""
+        if self._model is None and self._model_path is not None:
+            self._model = joblib.load(self._model_path)
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._model_path = None
+    
+    @property
+    def is_trained(self):
+        return self._model is not None or self._model_path is not None
+    
     def prepare_features(self, student_data):
         """Prepare features for prediction"""
         features = []
@@ -45,11 +97,14 @@ class DropoutPredictor:
         
         return pd.DataFrame(features, columns=self.feature_columns)
     
-    def train_model(self, training_data, labels):
+    def train_model(self, training_data, labels, n_jobs=None):
         """Train the dropout prediction model"""
-        # Prepare features
-        X = self.prepare_features(training_data)
-        y = np.array(labels)
+        # Prepare features (already a matrix when built by TrainingSetBuilder)
+        if isinstance(training_data, np.ndarray):
+            X = training_data.astype(np.float64, copy=False)
+        else:
+            X = self.features_to_matrix(training_data)
+        y = np.asarray(labels)
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -66,20 +121,45 @@ class DropoutPredictor:
             'gradient_boosting': GradientBoostingClassifier(n_estimators=100, random_state=42)
         }
         
-        best_model = None
-        best_score = 0
+        # Same 5 stratified folds for every candidate (as cross_val_score(cv=5))
+        folds = list(StratifiedKFold(n_splits=5).split(X_train_scaled, y_train))
         
-        for name, model in models.items():
-            # Cross-validation
-            cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=5)
-            avg_score = cv_scores.mean()
+        # Every candidate's fold fits run as one parallel batch
+        jobs = [
+            (name, train_idx, test_idx)
+            for name in models
+            for train_idx, test_idx in folds
+        ]
+        
+        training_started = time.perf_counter()
+        results = Parallel(n_jobs=self._training_n_jobs(n_jobs))(
+            delayed(_fit_and_score)(clone(models[name]), X_train_scaled, y_train, train_idx, test_idx)
+            for name, train_idx, test_idx in jobs
+        )
+        
+        candidates = {
+            name: {'cv_scores': [], 'fit_seconds_total': 0.0}
+            for name in models
+        }
+        for (name, train_idx, test_idx), (fold_model, score, fit_seconds) in zip(jobs, results):
+            candidates[name]['cv_scores'].append(score)
+            candidates[name]['fit_seconds_total'] += fit_seconds
+        
+        best_name = None
+        best_score = 0
+        for name, candidate in candidates.items():
+            candidate['cv_score'] = float(np.mean(candidate['cv_scores']))
             
-            if avg_score > best_score:
-                best_score = avg_score
-                best_model = model
+            if best_name is None or candidate['cv_score'] > best_score:
+                best_score = candidate['cv_score']
+                best_name = name
         
-        # Train best model
-        best_model.fit(X_train_scaled, y_train)
+        # Only the winner is refit on the full training split
+        best_model, _, refit_seconds = _fit_and_score(
+            clone(models[best_name]), X_train_scaled, y_train, np.arange(len(y_train)), None
+        )
+        candidates[best_name]['fit_seconds_total'] += refit_seconds
+        training_seconds = time.perf_counter() - training_started
         
         # Evaluate
         y_pred = best_model.predict(X_test_scaled)
@@ -89,133 +169,651 @@ class DropoutPredictor:
         f1 = f1_score(y_test, y_pred)
         
         self.model = best_model
+        self.compile_inference()
         
-        return {
+        self.metrics = {
             'accuracy': accuracy,
             'precision': precision,
             'recall': recall,
             'f1_score': f1,
-            'cross_val_score': best_score
+            'cross_val_score': best_score,
+            'algorithm': best_name,
+            'training_seconds': training_seconds,
+            'candidates': {
+                name: {
+                    'cv_score': candidate['cv_score'],
+                    # Summed over folds that may run in parallel, not wall-clock time
+                    'fit_seconds_total': candidate['fit_seconds_total']
+                }
+                for name, candidate in candidates.items()
+            }
         }
+        return self.metrics
+    
+    def _training_n_jobs(self, n_jobs):
+        if n_jobs is not None:
+            return n_jobs
+        return getattr(settings, 'ML_TRAINING_N_JOBS', -1)
     
     def predict_dropout_probability(self, student_features):
         """Predict dropout probability for a student"""
-        if self.model is None:
+        if not self.is_trained:
             raise ValueError("Model not trained yet")
         
         # Prepare features
-        X = self.prepare_features([student_features])
-        X_scaled = self.scaler.transform(X)
+        X = self.features_to_matrix([student_features])
+        X_scaled = self._scale(X)
         
         # Get probability
-        probability = self.model.predict_proba(X_scaled)[0][1]  # Probability of dropout
+        probability = self._predict_proba(X_scaled)[0]  # Probability of dropout
         
-        # Get feature importance for explanation
-        feature_importance = dict(zip(
-            self.feature_columns,
-            self.model.feature_importances_
-        ))
+        # Get this student's main contributing factors for explanation
+        risk_factors = self._risk_factors(X_scaled, self._explanation_top_k(None))[0]
         
         return {
             'dropout_probability': probability,
             'risk_level': self._get_risk_level(probability),
-            'feature_importance': feature_importance
+            'risk_factors': risk_factors,
+            # Key used before per-student explanations, kept for existing callers
+            'feature_importance': risk_factors
         }
     
+    def predict_batch(self, feature_matrix, explain_top_k=0):
+        """Predict dropout probabilities for a matrix of student feature rows"""
+        if not self.is_trained:
+            raise ValueError("Model not trained yet")
+        
+        # One row per student, columns in feature_columns order
+        X = np.asarray(feature_matrix, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        if X.shape[0] == 0:
+            return {
+                'dropout_probability': np.empty(0, dtype=np.float64),
+                'risk_level': np.empty(0, dtype=object),
+                'risk_factors': []
+            }
+        
+        # Single scaler pass and single predict_proba call for the whole batch
+        X_scaled = self._scale(X)
+        probabilities = self._predict_proba(X_scaled)
+        
+        # Per-student explanations, only the top contributors are kept; rows
+        # are left unexplained (empty dicts) when explain_top_k is 0
+        if explain_top_k:
+            risk_factors = self._risk_factors(X_scaled, explain_top_k)
+        else:
+            risk_factors = [{} for _ in range(X.shape[0])]
+        
+        return {
+            'dropout_probability': probabilities,
+            'risk_level': self._get_risk_levels(probabilities),
+            'risk_factors': risk_factors
+        }
+    
+    def compile_inference(self):
+        """Build the flattened tree backend for the current model, if enabled"""
+        self.inference = None
+        self._explainer = None
+        if getattr(settings, 'ML_INFERENCE_BACKEND', 'flat') != 'flat':
+            return
+        
+        try:
+            self.inference = FlatTreeEnsemble.from_model(self.model)
+        except UnsupportedModelError:
+            # Models that cannot be flattened keep using sklearn's predict_proba
+            self.inference = None
+    
+    def _scale(self, X):
+        """Apply the fitted scaler"""
+        if self.inference is None:
+            return self.scaler.transform(X)
+        # Same arithmetic as StandardScaler.transform without its input validation
+        return (X - self.scaler.mean_) / self.scaler.scale_
+    
+    def _predict_proba(self, X_scaled):
+        """Dropout probability for each scaled row"""
+        if self.inference is not None:
+            return self.inference.predict_proba(X_scaled)
+        return self.model.predict_proba(X_scaled)[:, 1]
+    
+    def _explanation_top_k(self, top_k):
+        if top_k is not None:
+            return top_k
+        return getattr(settings, 'ML_EXPLANATION_TOP_K', 3)
+    
+    def _get_explainer(self):
+        """Flattened ensemble used for path attribution, if the model supports it"""
+        if self.inference is not None:
+            return self.inference
+        
+        if self._explainer is None:
+            try:
+                self._explainer = FlatTreeEnsemble.from_model(self.model)
+            except UnsupportedModelError:
+                self._explainer = False
+        
+        return self._explainer or None
+    
+    def _risk_factors(self, X_scaled, top_k):
+        """Top-k per-student feature contributions, largest first"""
+        explainer = self._get_explainer()
+        
+        if explainer is None:
+            # Fall back to the model-wide importances
+            importances = getattr(self.model, 'feature_importances_', None)
+            if importances is None:
+                return [{} for _ in range(X_scaled.shape[0])]
+            contributions = np.broadcast_to(importances, (X_scaled.shape[0], len(importances)))
+        else:
+            contributions = explainer.explain(X_scaled, len(self.feature_columns))
+        
+        top = np.argsort(-np.abs(contributions), axis=1)[:, :top_k]
+        return [
+            {self.feature_columns[j]: round(float(contributions[i, j]), 4) for j in top[i]}
+            for i in range(contributions.shape[0])
+        ]
+    
+    def features_to_matrix(self, student_data):
+        """Pack feature dicts into a float matrix ordered by feature_columns"""
+        return self.prepare_features(student_data).to_numpy(dtype=np.float64)
+    
     def _get_risk_level(self, probability):
         """Convert probability to risk level"""
-        if probability >= 0.7:
+        if probability >= self.HIGH_RISK_THRESHOLD:
             return 'high'
-        elif probability >= 0.4:
+        elif probability >= self.MEDIUM_RISK_THRESHOLD:
             return 'medium'
         else:
             return 'low'
     
-    def save_model(self, model_name):
-        """Save trained model to disk"""
+    def _get_risk_levels(self, probabilities, high_threshold=None, medium_threshold=None):
+        """Convert an array of probabilities to risk levels"""
+        if high_threshold is None:
+            high_threshold = self.HIGH_RISK_THRESHOLD
+        if medium_threshold is None:
+            medium_threshold = self.MEDIUM_RISK_THRESHOLD
+        
+        probabilities = np.asarray(probabilities)
+        return np.select(
+            [
+                probabilities >= high_threshold,
+                probabilities >= medium_threshold
+            ],
+            ['high', 'medium'],
+            default='low'
+        ).astype(object)
+    
+    def save_model(self, model_name, metrics=None, compress=None):
+        """Save the trained model, scaler and feature schema as a versioned artifact"""
         model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
         os.makedirs(model_dir, exist_ok=True)
         
-        model_path = os.path.join(model_dir, f'{model_name}.pkl')
-        scaler_path = os.path.join(model_dir, f'{model_name}_scaler.pkl')
+        if compress is None:
+            compress = getattr(settings, 'ML_MODEL_COMPRESS', 0)
+        
+        model_path = os.path.join(model_dir, f'{model_name}.joblib')
+        estimator_path = os.path.join(model_dir, f'{model_name}.estimator.joblib')
         
-        joblib.dump(self.model, model_path)
-        joblib.dump(self.scaler, scaler_path)
+        # sklearn trees copy their node arrays when unpickled, so the estimator
+        # gets its own file and is only loaded when the sklearn path needs it
+        joblib.dump(self.model, estimator_path, compress=compress)
+        
+        bundle = {
+            'format_version': self.ARTIFACT_FORMAT_VERSION,
+            'estimator_file': os.path.basename(estimator_path),
+            'scaler': self.scaler,
+            'feature_columns': self.feature_columns,
+            'metrics': metrics or {},
+            # Flattened node arrays as plain ndarrays, memory-mapped on load
+            'inference': self.inference.to_dict() if self.inference is not None else None,
+        }
+        
+        # Compressed bundles are smaller but cannot be memory-mapped on load
+        joblib.dump(bundle, model_path, compress=compress)
         
         return model_path
     
-    def load_model(self, model_path):
+    def load_model(self, model_path, mmap_mode=None):
         """Load trained model from disk"""
-        scaler_path = model_path.replace('.pkl', '_scaler.pkl')
+        if mmap_mode is None:
+            mmap_mode = getattr(settings, 'ML_MODEL_MMAP_MODE', 'r') or None
+        
+        started = time.perf_counter()
+        self._explainer = None
+        
+        if model_path.endswith('.pkl'):
+            # Legacy layout: model and scaler in two separate pickles
+            scaler_path = model_path.replace('.pkl', '_scaler.pkl')
+            self.model = joblib.load(model_path)
+            self.scaler = joblib.load(scaler_path)
+            self.metrics = {}
+            self.compile_inference()
+        else:
+            bundle = joblib.load(model_path, mmap_mode=mmap_mode)
+            
+            if bundle.get('format_version') != self.ARTIFACT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported model artifact version: {bundle.get('format_version')}")
+            if bundle['feature_columns'] != self.feature_columns:
+                raise ValueError("Model artifact was trained on a different feature schema")
+            
+            self._model = None
+            self._model_path = os.path.join(os.path.dirname(model_path), bundle['estimator_file'])
+            self.scaler = bundle['scaler']
+            self.metrics = bundle['metrics']
+            
+            # Node arrays stay memory-mapped, so worker processes share one
+            # page-cached copy of an uncompressed bundle
+            self.inference = None
+            if bundle['inference'] is not None:
+                self.inference = FlatTreeEnsemble(**bundle['inference'])
+            if self.inference is None or getattr(settings, 'ML_INFERENCE_BACKEND', 'flat') != 'flat':
+                # Falls back to the sklearn estimator, loading it from its file
+                self.compile_inference()
         
-        self.model = joblib.load(model_path)
-        self.scaler = joblib.load(scaler_path)
+        self.load_seconds = time.perf_counter() - started
 
-# ML Service Class
-class MLService:
+# Model Registry
+class ModelRegistry:
+    """Process-wide cache of the active model, swapped when a new version is activated"""
+    
+    CACHE_KEY = 'analytics:active_model_id'
+    NO_ACTIVE_MODEL = 0
+    
     def __init__(self):
-        self.predictor = DropoutPredictor()
-        self._load_active_model()
+        self._lock = threading.Lock()
+        self._active = (None, None)  # (PredictionModel id, DropoutPredictor)
+    
+    @property
+    def check_interval(self):
+        return getattr(settings, 'ML_MODEL_CHECK_INTERVAL', 60)
+    
+    def get_active(self):
+        """Return (model id, in-memory predictor) for the currently active model"""
+        active_id = self.active_model_id()
+        
+        active = self._active
+        if active[0] == active_id:
+            return active
+        
+        with self._lock:
+            active = self._active
+            if active[0] != active_id:
+                active = (active_id, self._load(active_id))
+                self._active = active
+        
+        return active
+    
+    def get_predictor(self):
+        """Return the in-memory predictor for the currently active model"""
+        return self.get_active()[1]
+    
+    def activate(self, prediction_model, predictor=None):
+        """Publish a newly activated model, reusing an in-memory predictor if given"""
+        from django.core.cache import cache
+        
+        if predictor is not None:
+            with self._lock:
+                self._active = (prediction_model.id, predictor)
+        
+        cache.set(self.CACHE_KEY, prediction_model.id, self.check_interval)
     
-    def _load_active_model(self):
-        """Load the active ML model"""
+    def clear(self):
+        """Drop the loaded model so the next lookup reloads it"""
+        from django.core.cache import cache
+        
+        with self._lock:
+            self._active = (None, None)
+        cache.delete(self.CACHE_KEY)
+    
+    def active_model_id(self):
+        """Resolve the active model id, from the cache when possible"""
+        from django.core.cache import cache
+        from .models import PredictionModel
+        
+        active_id = cache.get(self.CACHE_KEY)
+        if active_id is None:
+            active_id = PredictionModel.objects.filter(
+                is_active=True
+            ).values_list('id', flat=True).first() or self.NO_ACTIVE_MODEL
+            cache.set(self.CACHE_KEY, active_id, self.check_interval)
+        
+        return active_id
+    
+    def _load(self, model_id):
+        """Load a model from disk"""
         from .models import PredictionModel
         
+        predictor = DropoutPredictor()
+        if model_id == self.NO_ACTIVE_MODEL:
+            return predictor
+        
         try:
-            active_model = PredictionModel.objects.filter(is_active=True).first()
-            if active_model:
-                self.predictor.load_model(active_model.model_file_path)
+            active_model = PredictionModel.objects.get(id=model_id)
+            predictor.load_model(active_model.model_file_path)
         except Exception as e:
             print(f"Error loading model: {e}")
+        
+        return predictor
+
+model_registry = ModelRegistry()
+
+# Prediction Writer
+class PredictionWriter:
+    """Buffer DropoutPrediction rows and insert them with bulk_create"""
+    
+    LATEST_FIELDS = [
+        'model', 'prediction_id', 'prediction_date', 'dropout_probability',
+        'risk_level', 'risk_factors', 'confidence_score'
+    ]
+    
+    def __init__(self, model_id, chunk_size=None, tolerance=None):
+        self.model_id = model_id
+        self.chunk_size = chunk_size or getattr(settings, 'PREDICTION_WRITE_CHUNK_SIZE', 1000)
+        self.tolerance = tolerance if tolerance is not None else getattr(
+            settings, 'PREDICTION_CHANGE_TOLERANCE', 0.01
+        )
+        self.written = 0
+        self.skipped = 0
+        self._buffer = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+    
+    def add(self, student, prediction):
+        """Queue a prediction, flushing once a full chunk is buffered"""
+        from .models import DropoutPrediction
+        
+        if not self.model_id:
+            return
+        
+        record = DropoutPrediction(
+            student_id=student.id,
+            model_id=self.model_id,
+            dropout_probability=prediction['dropout_probability'],
+            risk_factors=prediction.get('risk_factors', {}),
+            confidence_score=0.85  # Default confidence
+        )
+        self._buffer.append((record, prediction.get('risk_level', '')))
+        
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+    
+    def flush(self):
+        """Insert buffered predictions that differ from each student's latest one"""
+        from .models import DropoutPrediction, LatestDropoutPrediction
+        
+        if not self._buffer:
+            return
+        
+        buffer, self._buffer = self._buffer, []
+        latest = {
+            row.student_id: row
+            for row in LatestDropoutPrediction.objects.filter(
+                student_id__in=[record.student_id for record, _ in buffer]
+            ).only('student_id', 'model_id', 'dropout_probability', 'risk_level')
+        }
+        
+        changed = [
+            (record, risk_level) for record, risk_level in buffer
+            if self._has_changed(latest.get(record.student_id), record, risk_level)
+        ]
+        self.skipped += len(buffer) - len(changed)
+        if not changed:
+            return
+        
+        with transaction.atomic():
+            records = DropoutPrediction.objects.bulk_create(
+                [record for record, _ in changed], batch_size=self.chunk_size
+            )
+            LatestDropoutPrediction.objects.bulk_create(
+                [
+                    LatestDropoutPrediction(
+                        student_id=record.student_id,
+                        model_id=record.model_id,
+                        prediction_id=record.id,
+                        prediction_date=record.prediction_date,
+                        dropout_probability=record.dropout_probability,
+                        risk_level=risk_level,
+                        risk_factors=record.risk_factors,
+                        confidence_score=record.confidence_score
+                    )
+                    for record, (_, risk_level) in zip(records, changed)
+                ],
+                batch_size=self.chunk_size,
+                update_conflicts=True,
+                unique_fields=['student'],
+                update_fields=self.LATEST_FIELDS
+            )
+        
+        self.written += len(records)
+    
+    def _has_changed(self, latest, record, risk_level):
+        """Whether a prediction differs from the stored one beyond the tolerance"""
+        if latest is None or latest.model_id != record.model_id:
+            return True
+        return (
+            latest.risk_level != risk_level
+            or abs(latest.dropout_probability - record.dropout_probability) > self.tolerance
+        )
+
+# Prediction Cache
+class PredictionCache:
+    """Cache predictions by (model version, feature hash) and remember what was last stored per student"""
+    
+    # Entries expire after PREDICTION_CACHE_TIMEOUT; Redis evicts
+    # least-recently-used keys first under its allkeys-lru policy
+    KEY_PREFIX = 'analytics:prediction'
+    HITS_KEY = 'analytics:prediction_cache:hits'
+    MISSES_KEY = 'analytics:prediction_cache:misses'
+    
+    @property
+    def timeout(self):
+        return getattr(settings, 'PREDICTION_CACHE_TIMEOUT', 86400)
+    
+    @staticmethod
+    def feature_hash(row):
+        return hashlib.blake2b(np.ascontiguousarray(row, dtype=np.float64).tobytes(), digest_size=16).hexdigest()
+    
+    def prediction_key(self, model_id, feature_hash):
+        return f'{self.KEY_PREFIX}:{model_id}:{feature_hash}'
+    
+    def stored_key(self, student_id):
+        return f'{self.KEY_PREFIX}:stored:{student_id}'
+    
+    def get_many(self, model_id, feature_hashes, student_ids):
+        """Return (cached predictions by hash, last stored (model id, hash) by student)"""
+        from django.core.cache import cache
+        
+        prediction_keys = {self.prediction_key(model_id, h): h for h in set(feature_hashes)}
+        stored_keys = {self.stored_key(student_id): student_id for student_id in student_ids}
+        
+        found = cache.get_many(list(prediction_keys) + list(stored_keys))
+        predictions = {prediction_keys[key]: value for key, value in found.items() if key in prediction_keys}
+        stored = {stored_keys[key]: value for key, value in found.items() if key in stored_keys}
+        
+        self._count(self.HITS_KEY, len(predictions))
+        self._count(self.MISSES_KEY, len(prediction_keys) - len(predictions))
+        
+        return predictions, stored
+    
+    def set_predictions(self, model_id, predictions_by_hash):
+        from django.core.cache import cache
+        
+        cache.set_many({
+            self.prediction_key(model_id, h): prediction
+            for h, prediction in predictions_by_hash.items()
+        }, self.timeout)
+    
+    def set_stored(self, stored_by_student):
+        from django.core.cache import cache
+        
+        cache.set_many({
+            self.stored_key(student_id): stored
+            for student_id, stored in stored_by_student.items()
+        }, self.timeout)
+    
+    def stats(self):
+        """Hit and miss counters shared by every process using the cache"""
+        from django.core.cache import cache
+        
+        counters = cache.get_many([self.HITS_KEY, self.MISSES_KEY])
+        return {
+            'hits': counters.get(self.HITS_KEY, 0),
+            'misses': counters.get(self.MISSES_KEY, 0)
+        }
+    
+    def _count(self, key, amount):
+        from django.core.cache import cache
+        
+        if not amount:
+            return
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            cache.add(key, 0, None)
+            cache.incr(key, amount)
+
+prediction_cache = PredictionCache()
+
+# ML Service Class
+class MLService:
+    def __init__(self):
+        self.model_id, self.predictor = model_registry.get_active()
     
     def predict_student_dropout(self, student):
         """Predict dropout risk for a single student"""
-        from .models import StudentAnalytics
-        
         try:
-            analytics = StudentAnalytics.objects.get(student=student)
-            
-            student_features = {
-                'attendance_percentage': analytics.overall_attendance_percentage,
-                'gpa': analytics.overall_gpa,
-                'consecutive_absences': analytics.consecutive_absences,
-                'failing_subjects': analytics.failing_subjects_count,
-                'late_submissions': analytics.late_submissions,
-                'fee_overdue_days': analytics.overdue_payments,
-                'age': self._calculate_age(student.user.profile.date_of_birth),
-                'parent_education_level': 2,  # Default value
-                'family_income_bracket': 2   # Default value
-            }
-            
-            prediction = self.predictor.predict_dropout_probability(student_features)
-            
-            # Save prediction to database
-            self._save_prediction(student, prediction)
+            prediction = self.predict_students_dropout([student]).get(student.id)
+            if prediction is None:
+                raise ValueError("No analytics available")
             
             return prediction
-            
+        
         except Exception as e:
             print(f"Error predicting dropout for student {student.roll_number}: {e}")
             return {'dropout_probability': 0, 'risk_level': 'low'}
     
+    def predict_students_dropout(self, students, analytics_by_student=None, chunk_size=None):
+        """Predict dropout risk for many students in one vectorized pass"""
+        from .models import StudentAnalytics
+        
+        students = list(students)
+        if analytics_by_student is None:
+            analytics_by_student = {
+                analytics.student_id: analytics
+                for analytics in StudentAnalytics.objects.filter(student__in=students)
+            }
+        
+        scored_students = []
+        feature_rows = []
+        for student in students:
+            analytics = analytics_by_student.get(student.id)
+            if analytics is None:
+                continue
+            scored_students.append(student)
+            feature_rows.append(self._build_features(student, analytics))
+        
+        if not scored_students:
+            return {}
+        
+        X = self.predictor.features_to_matrix(feature_rows)
+        feature_hashes = [prediction_cache.feature_hash(row) for row in X]
+        cached, stored = prediction_cache.get_many(
+            self.model_id, feature_hashes, [student.id for student in scored_students]
+        )
+        
+        # Run the model only for feature vectors not already scored by this model
+        missing = {}
+        for i, feature_hash in enumerate(feature_hashes):
+            if feature_hash not in cached and feature_hash not in missing:
+                missing[feature_hash] = i
+        
+        if missing:
+            try:
+                rows = list(missing.values())
+                batch = self.predictor.predict_batch(
+                    X[rows], explain_top_k=self.predictor._explanation_top_k(None)
+                )
+            except Exception as e:
+                print(f"Error running batch prediction: {e}")
+                return {}
+            
+            computed = {
+                feature_hash: {
+                    'dropout_probability': float(batch['dropout_probability'][j]),
+                    'risk_level': str(batch['risk_level'][j]),
+                    'risk_factors': batch['risk_factors'][j]
+                }
+                for j, feature_hash in enumerate(missing)
+            }
+            if self.model_id:
+                prediction_cache.set_predictions(self.model_id, computed)
+            cached.update(computed)
+        
+        predictions = {}
+        newly_stored = {}
+        with PredictionWriter(self.model_id, chunk_size) as writer:
+            for student, feature_hash in zip(scored_students, feature_hashes):
+                prediction = cached[feature_hash]
+                predictions[student.id] = prediction
+                
+                # Skip the insert when this exact prediction is already stored
+                if stored.get(student.id) != (self.model_id, feature_hash):
+                    writer.add(student, prediction)
+                    newly_stored[student.id] = (self.model_id, feature_hash)
+        
+        if self.model_id and newly_stored:
+            prediction_cache.set_stored(newly_stored)
+        
+        return predictions
+    
+    def score_snapshot(self, snapshot, high_threshold=None, medium_threshold=None):
+        """Score every student in a feature snapshot without touching the database"""
+        batch = self.predictor.predict_batch(snapshot.features)
+        
+        if high_threshold is not None or medium_threshold is not None:
+            batch['risk_level'] = self.predictor._get_risk_levels(
+                batch['dropout_probability'], high_threshold, medium_threshold
+            )
+        
+        batch['roll_number'] = snapshot.roll_numbers
+        return batch
+    
+    def what_if(self, snapshot, roll_number, **overrides):
+        """Predict a student's risk with some snapshot features changed"""
+        row = np.array(snapshot.row_for(roll_number), dtype=np.float64)
+        
+        for name, value in overrides.items():
+            row[snapshot.feature_columns.index(name)] = value
+        
+        batch = self.predictor.predict_batch(row)
+        return {
+            'dropout_probability': float(batch['dropout_probability'][0]),
+            'risk_level': batch['risk_level'][0]
+        }
+    
+    def _build_features(self, student, analytics):
+        """Build the feature dict for a student from their analytics row"""
+        profile = getattr(student.user, 'profile', None)
+        
+        return {
+            'attendance_percentage': analytics.overall_attendance_percentage,
+            'gpa': analytics.overall_gpa,
+            'consecutive_absences': analytics.consecutive_absences,
+            'failing_subjects': analytics.failing_subjects_count,
+            'late_submissions': analytics.late_submissions,
+            # Overdue fee record count, the same value TrainingSetBuilder trains on
+            'fee_overdue_days': analytics.overdue_payments,
+            'age': self._calculate_age(profile.date_of_birth if profile else None),
+            'parent_education_level': 2,  # Default value
+            'family_income_bracket': 2   # Default value
+        }
+    
     def _calculate_age(self, birth_date):
         """Calculate age from birth date"""
-        from datetime import date
-        if birth_date:
-            today = date.today()
-            return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-        return 18  # Default age
-    
-    def _save_prediction(self, student, prediction):
-        """Save prediction to database"""
-        from .models import DropoutPrediction, PredictionModel
-        
-        active_model = PredictionModel.objects.filter(is_active=True).first()
-        if active_model:
-            DropoutPrediction.objects.create(
-                student=student,
-                model=active_model,
-                dropout_probability=prediction['dropout_probability'],
-                risk_factors=prediction.get('feature_importance', {}),
-                confidence_score=0.85  # Default confidence
-            )
\ No newline at end of file
+        return calculate_age(birth_date)
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from apps.students.models import Student
 
 class PredictionModel(models.Model):
@@ -23,10 +25,47 @@ class DropoutPrediction(models.Model):
     
     class Meta:
         ordering = ['-prediction_date']
+        indexes = [
+            models.Index(fields=['student', '-prediction_date']),
+            models.Index(fields=['-prediction_date', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.student.roll_number} - {self.dropout_probability:.2%} risk"
 
+class LatestDropoutPrediction(models.Model):
+    """Most recent prediction per student, kept for hot reads"""
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='latest_prediction')
+    model = models.ForeignKey(PredictionModel, on_delete=models.CASCADE)
+    # Plain id: a partitioned history table cannot be the target of a foreign key
+    prediction_id = models.BigIntegerField()
+    prediction_date = models.DateTimeField()
+    dropout_probability = models.FloatField()
+    risk_level = models.CharField(max_length=20)
+    risk_factors = models.JSONField(default=dict)
+    confidence_score = models.FloatField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['risk_level', '-dropout_probability']),
+            models.Index(fields=['-prediction_date', '-id']),
+        ]
+    
+    def __str__(self):
+        return f"Latest prediction for {self.student_id} - {self.dropout_probability:.2%} risk"
+    
+    def as_prediction(self):
+        """The history row this mirrors, built without reading the history table"""
+        return DropoutPrediction(
+            id=self.prediction_id,
+            student=self.student,
+            model=self.model,
+            prediction_date=self.prediction_date,
+            dropout_probability=self.dropout_probability,
+            risk_factors=self.risk_factors,
+            confidence_score=self.confidence_score
+        )
+
 class StudentAnalytics(models.Model):
     student = models.OneToOneField(Student, on_delete=models.CASCADE)
     
@@ -48,7 +87,38 @@ class StudentAnalytics(models.Model):
     fee_payment_history = models.JSONField(default=dict)
     overdue_payments = models.IntegerField(default=0)
     
+    # Running counters maintained by the incremental analytics pipeline
+    total_classes = models.IntegerField(default=0)
+    attended_classes = models.IntegerField(default=0)
+    marks_sum = models.BigIntegerField(default=0)
+    assessments_count = models.IntegerField(default=0)
+    last_attendance_date = models.DateField(null=True, blank=True)
+    last_attended_date = models.DateField(null=True, blank=True)
+    
     last_updated = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"Analytics for {self.student.roll_number}"
\ No newline at end of file
+        return f"Analytics for {self.student.roll_number}"
+
+class AnalyticsCheckpoint(models.Model):
+    """High-water mark of the rows already folded into StudentAnalytics"""
+    name = models.CharField(max_length=50, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.high_water_mark}"
+
+@receiver(post_save, sender=PredictionModel)
+def prediction_model_saved(sender, instance, **kwargs):
+    """Tell the model registry when a model version becomes active"""
+    if instance.is_active:
+        from .ml_models import model_registry
+        model_registry.activate(instance)
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def student_risk_changed(sender, instance, **kwargs):
+    """Drop the cached dashboard snapshot when student risk data changes"""
+    from .dashboard import dashboard_snapshot
+    dashboard_snapshot.invalidate()
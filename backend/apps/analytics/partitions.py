@@ -0,0 +1,121 @@
+from datetime import date
+from django.db import connection, transaction
+from .models import DropoutPrediction
+
+# Monthly range partitioning of prediction history on PostgreSQL. Partitions
+# are named <table>_yYYYYmMM and cover [first of month, first of next month);
+# <table>_default catches rows for months that have no partition yet.
+
+def _table():
+    return DropoutPrediction._meta.db_table
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+def _next_month(day):
+    return date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+def is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s",
+            [_table()]
+        )
+        return cursor.fetchone() is not None
+
+def create_default_partition(cursor):
+    """Create the partition catching rows outside every monthly range, if missing"""
+    table = _table()
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+def create_partition(cursor, month):
+    """Create the partition holding one month of predictions, if missing"""
+    table = _table()
+    start = _month_start(month)
+    end = _next_month(start)
+    name = f'{table}_y{start:%Y}m{start:%m}'
+    
+    cursor.execute('SELECT to_regclass(%s)', [f'"{name}"'])
+    if cursor.fetchone()[0] is not None:
+        return
+    
+    # Rows for this month that already landed in the default partition move
+    # into the new one before it is attached
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{table}_default" '
+        f'WHERE prediction_date >= %s AND prediction_date < %s RETURNING *) '
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [start.isoformat(), end.isoformat()]
+    )
+    cursor.execute(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+        [start.isoformat(), end.isoformat()]
+    )
+
+def ensure_partitions(months_ahead=3, start=None):
+    """Create partitions from start (default this month) through months_ahead months"""
+    month = _month_start(start or date.today())
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        create_default_partition(cursor)
+        for _ in range(months_ahead + 1):
+            create_partition(cursor, month)
+            created.append(month)
+            month = _next_month(month)
+    return created
+
+def convert_to_partitioned(months_ahead=3):
+    """Rebuild the prediction history table as a table partitioned by month"""
+    table = _table()
+    legacy = f'{table}_unpartitioned'
+    
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN(prediction_date) FROM "{table}"')
+        oldest = cursor.fetchone()[0]
+        
+        cursor.execute(
+            "SELECT is_identity FROM information_schema.columns "
+            "WHERE table_name = %s AND column_name = 'id'",
+            [table]
+        )
+        identity = cursor.fetchone()[0] == 'YES'
+        
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS'
+            f'{" INCLUDING IDENTITY" if identity else ""}) '
+            f'PARTITION BY RANGE (prediction_date)'
+        )
+        # The partition key must be part of the primary key
+        cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, prediction_date)')
+        cursor.execute(f'CREATE INDEX ON "{table}" (student_id, prediction_date DESC)')
+        cursor.execute(f'CREATE INDEX ON "{table}" (prediction_date DESC, id DESC)')
+        cursor.execute(f'CREATE INDEX ON "{table}" (model_id)')
+        
+        create_default_partition(cursor)
+        month = _month_start(oldest.date() if oldest else date.today())
+        last = _month_start(date.today())
+        for _ in range(months_ahead):
+            last = _next_month(last)
+        while month <= last:
+            create_partition(cursor, month)
+            month = _next_month(month)
+        
+        cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+        
+        if identity:
+            # The new identity sequence starts over; move it past the copied ids
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                f'COALESCE(MAX(id), 0) + 1, false) FROM "{table}"'
+            )
+        else:
+            # The serial sequence default was copied; keep it alive past the drop
+            cursor.execute(f'ALTER SEQUENCE "{table}_id_seq" OWNED BY "{table}".id')
+        
+        cursor.execute(f'DROP TABLE "{legacy}"')
@@ -0,0 +1,322 @@
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q, Sum
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+from apps.students.models import Student, Attendance, Assessment, FeeRecord, StudentAttendanceRollup
+from .models import StudentAnalytics
+
+# Average subject percentage below which a subject counts as failing
+FAILING_PERCENTAGE = 40
+
+ATTENDED_STATUSES = ['present', 'late']
+
+ANALYTICS_FIELDS = [
+    'overall_attendance_percentage',
+    'overall_gpa',
+    'consecutive_absences',
+    'failing_subjects_count',
+    'overdue_payments',
+    'total_classes',
+    'attended_classes',
+    'marks_sum',
+    'assessments_count',
+    'last_attendance_date',
+    'last_attended_date',
+]
+
+def attendance_percentage(attended, total):
+    return (attended / total) * 100 if total else 0
+
+def gpa_from_marks(marks_sum, assessments_count):
+    """Convert average obtained marks to a GPA on a 4.0 scale"""
+    if not assessments_count:
+        return 0
+    return min(((marks_sum / assessments_count) / 100) * 4.0, 4.0)
+
+class AnalyticsPipeline:
+    """Compute StudentAnalytics with one grouped aggregate query per metric"""
+    
+    def __init__(self, student_ids=None, batch_size=1000):
+        self.student_ids = student_ids
+        self.batch_size = batch_size
+    
+    def _filter_students(self, queryset, field='student_id'):
+        if self.student_ids is None:
+            return queryset
+        return queryset.filter(**{f'{field}__in': self.student_ids})
+    
+    def students(self):
+        """Queryset of the students this pipeline covers"""
+        return self._filter_students(Student.objects.all(), field='id')
+    
+    def compute_attendance(self, attendance=None):
+        """Map student id -> attendance counters and latest dates"""
+        if attendance is None:
+            attendance = self._filter_students(Attendance.objects.all())
+            rollups = self._filter_students(StudentAttendanceRollup.objects.all())
+        else:
+            rollups = None
+        
+        rows = attendance.values('student_id').annotate(
+            first_date=Min('date'),
+            last_date=Max('date'),
+            last_attended=Max('date', filter=Q(status__in=ATTENDED_STATUSES))
+        ).order_by()
+        counters = {row['student_id']: dict(row, total=0, attended=0) for row in rows}
+        missing = set(counters)
+        
+        # Counts come from the per-student rollup, which every attendance write
+        # (including corrections and deletes) keeps current
+        if rollups is None:
+            rollups = StudentAttendanceRollup.objects.filter(student_id__in=list(counters))
+        for student_id, total, present, late in rollups.values_list(
+            'student_id', 'total_classes', 'present', 'late'
+        ):
+            if student_id in counters:
+                counters[student_id]['total'] = total
+                counters[student_id]['attended'] = present + late
+                missing.discard(student_id)
+        
+        # Rows written before rollups existed have no rollup until the first
+        # rebuild_attendance_rollups, so those students are counted directly
+        if missing:
+            rows = Attendance.objects.filter(student_id__in=list(missing)).values('student_id').annotate(
+                total=Count('id'),
+                attended=Count('id', filter=Q(status__in=ATTENDED_STATUSES))
+            ).order_by()
+            for row in rows:
+                counters[row['student_id']]['total'] = row['total']
+                counters[row['student_id']]['attended'] = row['attended']
+        
+        return counters
+    
+    def compute_marks(self, assessments=None):
+        """Map student id -> (sum of obtained marks, number of assessments)"""
+        if assessments is None:
+            assessments = self._filter_students(Assessment.objects.all())
+        
+        rows = assessments.values('student_id').annotate(
+            marks_sum=Sum('obtained_marks'),
+            count=Count('id')
+        ).order_by()
+        
+        return {row['student_id']: (row['marks_sum'] or 0, row['count']) for row in rows}
+    
+    def compute_consecutive_absences(self, attendance=None):
+        """Map student id -> number of absent days since the last attended class"""
+        if attendance is None:
+            attendance = self.compute_attendance()
+        
+        # Only students whose latest class was missed have a streak; those
+        # sharing a last attended date share one date filter
+        streak_starts = {}
+        for student_id, counters in attendance.items():
+            if counters['last_attended'] is None or counters['last_date'] > counters['last_attended']:
+                streak_starts.setdefault(counters['last_attended'], []).append(student_id)
+        
+        if not streak_starts:
+            return {}
+        
+        in_streak = Q()
+        for last_attended, student_ids in streak_starts.items():
+            if last_attended is None:
+                in_streak |= Q(student_id__in=student_ids)
+            else:
+                in_streak |= Q(student_id__in=student_ids, date__gt=last_attended)
+        
+        rows = Attendance.objects.filter(status='absent').filter(in_streak).values(
+            'student_id'
+        ).annotate(
+            streak=Count('date', distinct=True)
+        ).order_by()
+        
+        return {row['student_id']: row['streak'] for row in rows}
+    
+    def compute_failing_subjects(self):
+        """Map student id -> number of subjects averaging below FAILING_PERCENTAGE"""
+        percentage = Cast(F('obtained_marks'), FloatField()) * 100 / NullIf(F('max_marks'), 0)
+        
+        rows = self._filter_students(Assessment.objects.all()).values(
+            'student_id', 'subject_id'
+        ).annotate(
+            avg_percentage=Avg(percentage)
+        ).filter(
+            avg_percentage__lt=FAILING_PERCENTAGE
+        ).order_by()
+        
+        failing = {}
+        for row in rows:
+            failing[row['student_id']] = failing.get(row['student_id'], 0) + 1
+        return failing
+    
+    def compute_overdue_payments(self):
+        """Map student id -> number of overdue fee records"""
+        rows = self._filter_students(FeeRecord.objects.filter(status='overdue')).values(
+            'student_id'
+        ).annotate(
+            overdue=Count('id')
+        ).order_by()
+        
+        return {row['student_id']: row['overdue'] for row in rows}
+    
+    def load_analytics(self, student_ids):
+        """Fetch or instantiate StudentAnalytics rows for the given students"""
+        existing = {
+            analytics.student_id: analytics
+            for analytics in self._filter_students(StudentAnalytics.objects.all())
+        }
+        
+        return {
+            student_id: existing.get(student_id) or StudentAnalytics(student_id=student_id)
+            for student_id in student_ids
+        }
+    
+    def save_analytics(self, analytics_by_student):
+        """Write analytics rows back with bulk_create/bulk_update"""
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for analytics in analytics_by_student.values():
+            analytics.last_updated = now
+            if analytics.pk is None:
+                to_create.append(analytics)
+            else:
+                to_update.append(analytics)
+        
+        StudentAnalytics.objects.bulk_create(to_create, batch_size=self.batch_size)
+        StudentAnalytics.objects.bulk_update(
+            to_update, ANALYTICS_FIELDS + ['last_updated'], batch_size=self.batch_size
+        )
+    
+    def run(self):
+        """Recompute analytics for all selected students and write them back in bulk"""
+        attendance = self.compute_attendance()
+        marks = self.compute_marks()
+        absences = self.compute_consecutive_absences(attendance)
+        failing = self.compute_failing_subjects()
+        overdue = self.compute_overdue_payments()
+        
+        student_ids = list(self.students().values_list('id', flat=True))
+        analytics_by_student = self.load_analytics(student_ids)
+        
+        for student_id, analytics in analytics_by_student.items():
+            counters = attendance.get(student_id, {})
+            analytics.total_classes = counters.get('total', 0)
+            analytics.attended_classes = counters.get('attended', 0)
+            analytics.last_attendance_date = counters.get('last_date')
+            analytics.last_attended_date = counters.get('last_attended')
+            analytics.marks_sum, analytics.assessments_count = marks.get(student_id, (0, 0))
+            
+            analytics.overall_attendance_percentage = attendance_percentage(
+                analytics.attended_classes, analytics.total_classes
+            )
+            analytics.overall_gpa = gpa_from_marks(analytics.marks_sum, analytics.assessments_count)
+            analytics.consecutive_absences = absences.get(student_id, 0)
+            analytics.failing_subjects_count = failing.get(student_id, 0)
+            analytics.overdue_payments = overdue.get(student_id, 0)
+        
+        self.save_analytics(analytics_by_student)
+        return analytics_by_student
+
+class IncrementalAnalyticsPipeline(AnalyticsPipeline):
+    """Update StudentAnalytics counters from rows created or edited since a high-water mark"""
+    
+    def __init__(self, since, until, batch_size=1000):
+        super().__init__(batch_size=batch_size)
+        self.since = since
+        self.until = until
+    
+    def _new_rows(self, model):
+        return model.objects.filter(created_at__gt=self.since, created_at__lte=self.until)
+    
+    def _edited_student_ids(self, model):
+        """Students with rows counted by an earlier run and edited since"""
+        return set(
+            model.objects.filter(
+                updated_at__gt=self.since, updated_at__lte=self.until, created_at__lte=self.since
+            ).values_list('student_id', flat=True).distinct()
+        )
+    
+    def run(self):
+        new_attendance = self.compute_attendance(self._new_rows(Attendance))
+        new_marks = self.compute_marks(self._new_rows(Assessment))
+        
+        # An edit's previous value is unknown, so edited students are recomputed in
+        # full; deleted rows leave no trace and wait for the nightly full rebuild
+        edited_ids = self._edited_student_ids(Attendance) | self._edited_student_ids(Assessment)
+        
+        changed_ids = set(new_attendance) | set(new_marks) | edited_ids
+        if not changed_ids:
+            self.student_ids = []
+            return {}
+        
+        self.student_ids = list(changed_ids)
+        analytics_by_student = self.load_analytics(self.student_ids)
+        
+        # Distinct absent dates among the new rows, for extending absence streaks
+        new_absent_dates = {}
+        absent_rows = self._new_rows(Attendance).filter(
+            status='absent'
+        ).values_list('student_id', 'date').distinct()
+        for student_id, absent_date in absent_rows:
+            new_absent_dates.setdefault(student_id, set()).add(absent_date)
+        
+        # New students, and attendance backfilled on or before the last counted
+        # date, cannot be applied as increments and are recomputed in full
+        recompute_ids = set(edited_ids)
+        for student_id, counters in new_attendance.items():
+            analytics = analytics_by_student[student_id]
+            if student_id in recompute_ids or analytics.pk is None or (
+                analytics.last_attendance_date is not None
+                and counters['first_date'] <= analytics.last_attendance_date
+            ):
+                recompute_ids.add(student_id)
+                continue
+            
+            analytics.total_classes = counters['total']
+            analytics.attended_classes = counters['attended']
+            analytics.last_attendance_date = counters['last_date']
+            
+            absent_dates = new_absent_dates.get(student_id, set())
+            if counters['last_attended'] is not None:
+                analytics.last_attended_date = counters['last_attended']
+                analytics.consecutive_absences = sum(
+                    1 for absent_date in absent_dates if absent_date > counters['last_attended']
+                )
+            else:
+                analytics.consecutive_absences += len(absent_dates)
+            
+            analytics.overall_attendance_percentage = attendance_percentage(
+                analytics.attended_classes, analytics.total_classes
+            )
+        
+        if new_marks:
+            failing = AnalyticsPipeline(student_ids=list(new_marks)).compute_failing_subjects()
+            for student_id, (marks_sum, count) in new_marks.items():
+                analytics = analytics_by_student[student_id]
+                if analytics.pk is None or student_id in recompute_ids:
+                    recompute_ids.add(student_id)
+                    continue
+                
+                analytics.marks_sum += marks_sum
+                analytics.assessments_count += count
+                analytics.overall_gpa = gpa_from_marks(analytics.marks_sum, analytics.assessments_count)
+                analytics.failing_subjects_count = failing.get(student_id, 0)
+        
+        # Fee records carry no timestamps, so re-scored students get a fresh count
+        overdue = self.compute_overdue_payments()
+        for student_id, analytics in analytics_by_student.items():
+            analytics.overdue_payments = overdue.get(student_id, 0)
+        
+        incremental = {
+            student_id: analytics
+            for student_id, analytics in analytics_by_student.items()
+            if student_id not in recompute_ids
+        }
+        self.save_analytics(incremental)
+        
+        if recompute_ids:
+            analytics_by_student.update(
+                AnalyticsPipeline(student_ids=list(recompute_ids), batch_size=self.batch_size).run()
+            )
+        
+        return analytics_by_student
@@ -1,44 +1,70 @@
 from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
-from .models import Student, StudentAnalytics, DropoutPrediction
-from .ml_models import MLService
+from .models import Student, StudentAnalytics, DropoutPrediction, AnalyticsCheckpoint
+from .ml_models import DropoutPredictor, MLService, model_registry
+from .pipeline import AnalyticsPipeline, IncrementalAnalyticsPipeline
+from .dashboard import dashboard_snapshot
 
 @shared_task
-def update_student_analytics():
-    """Update analytics for all students"""
-    students = Student.objects.all()
-    ml_service = MLService()
+def update_student_analytics(full=False):
+    """Update analytics for students with new attendance or assessment data"""
+    try:
+        run_started = timezone.now()
+        checkpoint, created = AnalyticsCheckpoint.objects.get_or_create(name='student_analytics')
+        
+        if full or checkpoint.high_water_mark is None:
+            # Recompute every student's metrics with grouped aggregates
+            pipeline = AnalyticsPipeline()
+        else:
+            # Fold in only the rows created or edited since the last run
+            pipeline = IncrementalAnalyticsPipeline(
+                since=checkpoint.high_water_mark,
+                until=run_started
+            )
+        
+        analytics_by_student = pipeline.run()
+        
+        # Re-score only the students whose analytics changed, in one batch
+        if analytics_by_student:
+            students = pipeline.students().select_related('user__profile')
+            ml_service = MLService()
+            ml_service.predict_students_dropout(students, analytics_by_student)
+        
+        checkpoint.high_water_mark = run_started
+        checkpoint.save()
+        
+        # Precompute the dashboard so teachers' next load is a cache read
+        dashboard_snapshot.refresh()
     
-    for student in students:
-        try:
-            # Update analytics
-            analytics, created = StudentAnalytics.objects.get_or_create(student=student)
-            
-            # Calculate attendance percentage
-            analytics.overall_attendance_percentage = calculate_attendance_percentage(student)
-            
-            # Calculate GPA
-            analytics.overall_gpa = calculate_gpa(student)
-            
-            # Update other metrics
-            analytics.consecutive_absences = calculate_consecutive_absences(student)
-            analytics.failing_subjects_count = calculate_failing_subjects(student)
-            
-            analytics.save()
-            
-            # Generate dropout prediction
-            ml_service.predict_student_dropout(student)
-            
-        except Exception as e:
-            print(f"Error updating analytics for {student.roll_number}: {e}")
+    except Exception as e:
+        print(f"Error updating student analytics: {e}")
 
 @shared_task
-def retrain_ml_model():
+def write_feature_snapshot(snapshot_date=None):
+    """Write a dated feature snapshot for training and scoring"""
+    from .feature_store import FeatureStore
+    
+    try:
+        snapshot = FeatureStore().write_snapshot(snapshot_date)
+        print(f"Wrote feature snapshot {snapshot.meta['snapshot_date']} with {len(snapshot)} students")
+    except Exception as e:
+        print(f"Error writing feature snapshot: {e}")
+
+@shared_task
+def retrain_ml_model(snapshot_date=None):
     """Retrain the ML model with new data"""
     try:
         # Collect training data
-        training_data, labels = collect_training_data()
+        if snapshot_date:
+            # Train from a stored snapshot instead of re-running the aggregates
+            from .feature_store import FeatureStore
+            training_data, labels = FeatureStore().load(snapshot_date).training_set()
+        else:
+            training_data, labels = collect_training_data()
+        if len(labels) == 0:
+            print("No historical students with known outcomes to train on")
+            return
         
         # Train model
         predictor = DropoutPredictor()
@@ -46,39 +72,46 @@ def retrain_ml_model():
         
         # Save new model if performance is good
         if metrics['accuracy'] > 0.75:
-            model_path = predictor.save_model(f"dropout_model_{timezone.now().strftime('%Y%m%d_%H%M%S')}")
+            model_path = predictor.save_model(
+                f"dropout_model_{timezone.now().strftime('%Y%m%d_%H%M%S')}",
+                metrics=metrics
+            )
             
             # Create model record
             from .models import PredictionModel
             PredictionModel.objects.filter(is_active=True).update(is_active=False)
             
-            PredictionModel.objects.create(
+            prediction_model = PredictionModel.objects.create(
                 name="Dropout Prediction Model",
                 version=timezone.now().strftime('%Y%m%d_%H%M%S'),
-                algorithm="Random Forest / Gradient Boosting",
+                algorithm=metrics['algorithm'],
                 accuracy=metrics['accuracy'],
                 is_active=True,
                 model_file_path=model_path
             )
             
+            # Swap the freshly trained model in without reloading it from disk
+            model_registry.activate(prediction_model, predictor)
+            
             print(f"New model trained with accuracy: {metrics['accuracy']:.4f}")
         
+        for name, candidate in metrics['candidates'].items():
+            print(f"{name}: cv score {candidate['cv_score']:.4f}, total fit time {candidate['fit_seconds_total']:.1f}s")
+        print(f"Training wall-clock time: {metrics['training_seconds']:.1f}s")
+    
     except Exception as e:
         print(f"Error retraining model: {e}")
 
-def calculate_attendance_percentage(student):
-    """Calculate overall attendance percentage"""
-    from django.db.models import Count, Q
-    
-    total_classes = student.attendance_set.count()
-    if total_classes == 0:
-        return 0
-    
-    present_classes = student.attendance_set.filter(
-        Q(status='present') | Q(status='late')
-    ).count()
+@shared_task
+def ensure_prediction_partitions(months_ahead=3):
+    """Create upcoming monthly partitions for prediction history"""
+    from . import partitions
     
-    return (present_classes / total_classes) * 100
+    try:
+        if partitions.is_supported() and partitions.is_partitioned():
+            partitions.ensure_partitions(months_ahead)
+    except Exception as e:
+        print(f"Error creating prediction partitions: {e}")
 
 def calculate_gpa(student):
     """Calculate student's GPA"""
@@ -96,6 +129,7 @@ def calculate_gpa(student):
 
 def collect_training_data():
     """Collect historical data for model training"""
-    # This would collect historical data of students who have dropped out
-    # and those who have completed their education
-    pass
\ No newline at end of file
+    from .training import TrainingSetBuilder
+    
+    # Feature matrix and labels for students who graduated or dropped out
+    return TrainingSetBuilder().build()
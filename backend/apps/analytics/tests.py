@@ -1,3 +1,635 @@
+import numpy as np
 from django.test import TestCase
+from .ml_models import DropoutPredictor
+from .models import StudentAnalytics
 
-# Create your tests here.
+def make_training_data(n=200, seed=0):
+    """Build a small synthetic training set for the predictor"""
+    rng = np.random.default_rng(seed)
+    training_data = []
+    labels = []
+    
+    for _ in range(n):
+        attendance = float(rng.uniform(40, 100))
+        gpa = float(rng.uniform(0, 4))
+        training_data.append({
+            'attendance_percentage': attendance,
+            'gpa': gpa,
+            'consecutive_absences': int(rng.integers(0, 15)),
+            'failing_subjects': int(rng.integers(0, 5)),
+            'late_submissions': int(rng.integers(0, 10)),
+            'fee_overdue_days': int(rng.integers(0, 90)),
+            'age': int(rng.integers(14, 20)),
+            'parent_education_level': int(rng.integers(1, 4)),
+            'family_income_bracket': int(rng.integers(1, 4))
+        })
+        labels.append(int(attendance < 70 or gpa < 1.5))
+    
+    return training_data, labels
+
+class DropoutPredictorBatchTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.training_data, cls.labels = make_training_data()
+        cls.predictor = DropoutPredictor()
+        cls.metrics = cls.predictor.train_model(cls.training_data, cls.labels, n_jobs=1)
+    
+    def test_predict_batch_matches_single_predictions(self):
+        rows = self.training_data[:25]
+        X = self.predictor.features_to_matrix(rows)
+        
+        batch = self.predictor.predict_batch(X)
+        
+        self.assertEqual(batch['dropout_probability'].shape, (25,))
+        for i, row in enumerate(rows):
+            single = self.predictor.predict_dropout_probability(row)
+            self.assertAlmostEqual(
+                batch['dropout_probability'][i], single['dropout_probability']
+            )
+            self.assertEqual(batch['risk_level'][i], single['risk_level'])
+    
+    def test_training_reports_candidates(self):
+        self.assertIn(self.metrics['algorithm'], self.metrics['candidates'])
+        for candidate in self.metrics['candidates'].values():
+            self.assertGreater(candidate['fit_seconds_total'], 0)
+            self.assertLessEqual(candidate['cv_score'], 1)
+    
+    def test_artifact_bundle_round_trip(self):
+        import tempfile
+        from django.test import override_settings
+        
+        with tempfile.TemporaryDirectory() as base_dir, override_settings(BASE_DIR=base_dir):
+            model_path = self.predictor.save_model('test_model', metrics=self.metrics)
+            
+            loaded = DropoutPredictor()
+            loaded.load_model(model_path)
+            
+            X = self.predictor.features_to_matrix(self.training_data[:10])
+            np.testing.assert_allclose(
+                loaded.predict_batch(X)['dropout_probability'],
+                self.predictor.predict_batch(X)['dropout_probability']
+            )
+            self.assertEqual(loaded.metrics['algorithm'], self.metrics['algorithm'])
+            self.assertIsNotNone(loaded.load_seconds)
+            
+            # Scoring runs on the memory-mapped node arrays without unpickling sklearn
+            self.assertIsInstance(loaded.inference.threshold, np.memmap)
+            self.assertIsNone(loaded._model)
+    
+    def test_predict_batch_empty(self):
+        X = np.empty((0, len(self.predictor.feature_columns)))
+        
+        batch = self.predictor.predict_batch(X)
+        
+        self.assertEqual(len(batch['dropout_probability']), 0)
+        self.assertEqual(len(batch['risk_level']), 0)
+        self.assertEqual(batch['risk_factors'], [])
+    
+    def test_predict_batch_shape_without_explanations(self):
+        X = self.predictor.features_to_matrix(self.training_data[:3])
+        
+        batch = self.predictor.predict_batch(X)
+        
+        self.assertEqual(set(batch), {'dropout_probability', 'risk_level', 'risk_factors'})
+        self.assertEqual(batch['risk_factors'], [{}, {}, {}])
+    
+    def test_single_prediction_keeps_feature_importance_key(self):
+        single = self.predictor.predict_dropout_probability(self.training_data[0])
+        
+        self.assertEqual(single['feature_importance'], single['risk_factors'])
+    
+    def test_risk_levels_vectorized(self):
+        levels = self.predictor._get_risk_levels([0.1, 0.4, 0.69, 0.7, 0.95])
+        
+        self.assertEqual(list(levels), ['low', 'medium', 'medium', 'high', 'high'])
+
+class AnalyticsPipelineTestCase(TestCase):
+    def setUp(self):
+        from datetime import date
+        from django.contrib.auth import get_user_model
+        from apps.students.models import Class, Student, Subject, Attendance, Assessment
+        
+        User = get_user_model()
+        student_class = Class.objects.create(
+            name='Pipeline Class',
+            grade=10,
+            section='A',
+            academic_year='2024-25'
+        )
+        self.student = Student.objects.create(
+            user=User.objects.create_user(username='pipeline', user_type='student'),
+            roll_number='PL001',
+            student_class=student_class,
+            admission_date='2024-01-01',
+            parent_name='Test Parent',
+            parent_phone='+1234567890',
+            address='Test Address'
+        )
+        math = Subject.objects.create(name='Math', code='MATH')
+        science = Subject.objects.create(name='Science', code='SCI')
+        
+        statuses = ['present', 'late', 'absent', 'present', 'absent', 'absent']
+        for day, attendance_status in enumerate(statuses, start=1):
+            Attendance.objects.create(
+                student=self.student,
+                subject=math,
+                date=date(2024, 3, day),
+                status=attendance_status
+            )
+        
+        for subject, marks in [(math, 30), (science, 80)]:
+            Assessment.objects.create(
+                student=self.student,
+                subject=subject,
+                assessment_type='quiz',
+                title='Quiz 1',
+                max_marks=100,
+                obtained_marks=marks,
+                date_conducted=date(2024, 3, 1)
+            )
+    
+    def test_run_computes_metrics_in_bulk(self):
+        from datetime import date
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.students.models import FeeRecord
+        from .pipeline import AnalyticsPipeline
+        
+        FeeRecord.objects.create(
+            student=self.student,
+            academic_year='2024-25',
+            semester='1',
+            total_amount=1000,
+            due_date=date(2024, 2, 1),
+            status='overdue'
+        )
+        
+        with CaptureQueriesContext(connection) as queries:
+            AnalyticsPipeline().run()
+        
+        self.assertLessEqual(len(queries), 9)
+        
+        analytics = StudentAnalytics.objects.get(student=self.student)
+        self.assertAlmostEqual(analytics.overall_attendance_percentage, 50.0)
+        self.assertAlmostEqual(analytics.overall_gpa, 2.2)
+        self.assertEqual(analytics.consecutive_absences, 2)
+        self.assertEqual(analytics.failing_subjects_count, 1)
+        self.assertEqual(analytics.overdue_payments, 1)
+    
+    def test_late_attendance_breaks_absence_streak(self):
+        from datetime import date
+        from apps.students.models import Subject, Attendance
+        from .pipeline import AnalyticsPipeline
+        
+        math = Subject.objects.get(code='MATH')
+        Attendance.objects.create(student=self.student, subject=math, date=date(2024, 3, 7), status='late')
+        Attendance.objects.create(student=self.student, subject=math, date=date(2024, 3, 8), status='absent')
+        
+        AnalyticsPipeline().run()
+        
+        analytics = StudentAnalytics.objects.get(student=self.student)
+        self.assertEqual(analytics.consecutive_absences, 1)
+        self.assertEqual(analytics.last_attended_date, date(2024, 3, 7))
+    
+    def test_incremental_run_applies_new_rows(self):
+        from datetime import date
+        from django.utils import timezone
+        from apps.students.models import Subject, Attendance
+        from .pipeline import AnalyticsPipeline, IncrementalAnalyticsPipeline
+        
+        AnalyticsPipeline().run()
+        since = timezone.now()
+        
+        math = Subject.objects.get(code='MATH')
+        Attendance.objects.create(student=self.student, subject=math, date=date(2024, 3, 7), status='absent')
+        Attendance.objects.create(student=self.student, subject=math, date=date(2024, 3, 8), status='absent')
+        
+        pipeline = IncrementalAnalyticsPipeline(since=since, until=timezone.now())
+        changed = pipeline.run()
+        
+        self.assertEqual(list(changed), [self.student.id])
+        analytics = StudentAnalytics.objects.get(student=self.student)
+        self.assertEqual(analytics.total_classes, 8)
+        self.assertEqual(analytics.attended_classes, 3)
+        self.assertAlmostEqual(analytics.overall_attendance_percentage, 37.5)
+        self.assertEqual(analytics.consecutive_absences, 4)
+        
+        # Nothing new since the last run means nothing to re-score
+        self.assertEqual(
+            IncrementalAnalyticsPipeline(since=timezone.now(), until=timezone.now()).run(),
+            {}
+        )
+    
+    def test_incremental_run_recomputes_edited_rows(self):
+        from datetime import date
+        from django.utils import timezone
+        from apps.students.models import Attendance
+        from .pipeline import AnalyticsPipeline, IncrementalAnalyticsPipeline
+        
+        AnalyticsPipeline().run()
+        since = timezone.now()
+        
+        # A status correction keeps created_at and only bumps updated_at
+        corrected = Attendance.objects.get(student=self.student, date=date(2024, 3, 6))
+        corrected.status = 'present'
+        corrected.save()
+        
+        changed = IncrementalAnalyticsPipeline(since=since, until=timezone.now()).run()
+        
+        self.assertEqual(list(changed), [self.student.id])
+        analytics = StudentAnalytics.objects.get(student=self.student)
+        self.assertEqual(analytics.attended_classes, 4)
+        self.assertEqual(analytics.consecutive_absences, 0)
+    
+    def test_incremental_counts_come_from_rollup(self):
+        from datetime import date
+        from django.utils import timezone
+        from apps.students.models import Subject, Attendance
+        from .pipeline import AnalyticsPipeline, IncrementalAnalyticsPipeline
+        
+        AnalyticsPipeline().run()
+        since = timezone.now()
+        
+        # The deleted row is only visible through the rollup its signal updated
+        Attendance.objects.get(student=self.student, date=date(2024, 3, 1)).delete()
+        math = Subject.objects.get(code='MATH')
+        Attendance.objects.create(student=self.student, subject=math, date=date(2024, 3, 7), status='present')
+        
+        IncrementalAnalyticsPipeline(since=since, until=timezone.now()).run()
+        
+        analytics = StudentAnalytics.objects.get(student=self.student)
+        self.assertEqual(analytics.total_classes, 6)
+        self.assertEqual(analytics.attended_classes, 3)
+        self.assertEqual(analytics.consecutive_absences, 0)
+    
+    def test_students_without_rollup_fall_back_to_raw_counts(self):
+        from apps.students.models import StudentAttendanceRollup
+        from .pipeline import AnalyticsPipeline
+        
+        StudentAttendanceRollup.objects.all().delete()
+        
+        AnalyticsPipeline().run()
+        
+        analytics = StudentAnalytics.objects.get(student=self.student)
+        self.assertEqual(analytics.total_classes, 6)
+        self.assertEqual(analytics.attended_classes, 3)
+        self.assertAlmostEqual(analytics.overall_attendance_percentage, 50.0)
+
+class ModelRegistryTestCase(TestCase):
+    def setUp(self):
+        from .ml_models import ModelRegistry
+        self.registry = ModelRegistry()
+        self.registry.clear()
+    
+    def tearDown(self):
+        self.registry.clear()
+    
+    def test_predictor_is_reused_between_lookups(self):
+        first = self.registry.get_predictor()
+        second = self.registry.get_predictor()
+        
+        self.assertIs(first, second)
+        self.assertIsNone(first.model)
+    
+    def test_activate_swaps_in_memory_predictor(self):
+        from .models import PredictionModel
+        
+        predictor = DropoutPredictor()
+        prediction_model = PredictionModel.objects.create(
+            name='Test Model',
+            version='1',
+            algorithm='Random Forest',
+            accuracy=0.9,
+            is_active=True,
+            model_file_path='/nonexistent/model.pkl'
+        )
+        
+        self.registry.activate(prediction_model, predictor)
+        
+        self.assertIs(self.registry.get_predictor(), predictor)
+
+class PredictionWriterTestCase(TestCase):
+    def test_predictions_are_flushed_in_chunks(self):
+        from datetime import date
+        from django.contrib.auth import get_user_model
+        from apps.students.models import Class, Student
+        from .ml_models import PredictionWriter
+        from .models import DropoutPrediction, LatestDropoutPrediction, PredictionModel
+        
+        User = get_user_model()
+        student_class = Class.objects.create(
+            name='Writer Class',
+            grade=10,
+            section='A',
+            academic_year='2024-25'
+        )
+        students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f'writer{i}', user_type='student'),
+                roll_number=f'WR{i:03d}',
+                student_class=student_class,
+                admission_date=date(2024, 1, 1),
+                parent_name='Test Parent',
+                parent_phone='+1234567890',
+                address='Test Address'
+            )
+            for i in range(5)
+        ]
+        prediction_model = PredictionModel.objects.create(
+            name='Test Model',
+            version='1',
+            algorithm='Random Forest',
+            accuracy=0.9,
+            model_file_path='/nonexistent/model.pkl'
+        )
+        
+        # Per chunk: one latest-prediction lookup, one insert, one upsert, plus the
+        # SAVEPOINT and RELEASE of the chunk's atomic block inside the test transaction
+        with self.assertNumQueries(15):
+            with PredictionWriter(prediction_model.id, chunk_size=2) as writer:
+                for student in students:
+                    writer.add(student, {'dropout_probability': 0.5, 'risk_level': 'medium'})
+        
+        self.assertEqual(writer.written, 5)
+        self.assertEqual(DropoutPrediction.objects.count(), 5)
+        self.assertEqual(LatestDropoutPrediction.objects.count(), 5)
+        
+        # Unchanged within tolerance: only the second student gets a new row
+        with PredictionWriter(prediction_model.id, tolerance=0.01) as writer:
+            writer.add(students[0], {'dropout_probability': 0.505, 'risk_level': 'medium'})
+            writer.add(students[1], {'dropout_probability': 0.75, 'risk_level': 'high'})
+        
+        self.assertEqual((writer.written, writer.skipped), (1, 1))
+        self.assertEqual(DropoutPrediction.objects.count(), 6)
+        self.assertEqual(students[1].latest_prediction.risk_level, 'high')
+
+class DashboardSnapshotTestCase(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from apps.students.models import Class, Student
+        from .dashboard import dashboard_snapshot
+        
+        self.student_class = Class.objects.create(
+            name='Dashboard Class',
+            grade=10,
+            section='A',
+            academic_year='2024-25'
+        )
+        for i, risk_level in enumerate(['high', 'low', 'low']):
+            Student.objects.create(
+                user=get_user_model().objects.create_user(username=f'dashboard{i}', user_type='student'),
+                roll_number=f'DB{i:03d}',
+                student_class=self.student_class,
+                admission_date='2024-01-01',
+                parent_name='Test Parent',
+                parent_phone='+1234567890',
+                address='Test Address',
+                current_risk_level=risk_level
+            )
+        
+        self.snapshot = dashboard_snapshot
+        self.snapshot.invalidate()
+    
+    def tearDown(self):
+        self.snapshot.invalidate()
+    
+    def test_build_aggregates_students(self):
+        data = self.snapshot.build()
+        
+        self.assertEqual(data['total_students'], 3)
+        self.assertEqual(
+            data['risk_distribution'],
+            [{'current_risk_level': 'high', 'count': 1}, {'current_risk_level': 'low', 'count': 2}]
+        )
+    
+    def test_repeated_get_is_served_from_cache(self):
+        first = self.snapshot.get()
+        
+        with self.assertNumQueries(0):
+            second = self.snapshot.get()
+        
+        self.assertEqual(second['etag'], first['etag'])
+        self.assertEqual(second['data']['total_students'], 3)
+    
+    def test_invalidate_rebuilds_with_new_etag(self):
+        from django.contrib.auth import get_user_model
+        from apps.students.models import Student
+        
+        first = self.snapshot.get()
+        Student.objects.bulk_create([Student(
+            user=get_user_model().objects.create_user(username='dashboard_new', user_type='student'),
+            roll_number='DB999',
+            student_class=self.student_class,
+            admission_date='2024-01-01',
+            parent_name='Test Parent',
+            parent_phone='+1234567890',
+            address='Test Address'
+        )])
+        
+        # bulk_create sends no post_save, so the cached snapshot is stale until invalidated
+        self.assertEqual(self.snapshot.get()['data']['total_students'], 3)
+        
+        self.snapshot.invalidate()
+        rebuilt = self.snapshot.get()
+        
+        self.assertEqual(rebuilt['data']['total_students'], 4)
+        self.assertNotEqual(rebuilt['etag'], first['etag'])
+
+class TrainingSetBuilderTestCase(TestCase):
+    def test_build_streams_labelled_features(self):
+        from datetime import date
+        from django.contrib.auth import get_user_model
+        from apps.students.models import Class, Student, Subject, Attendance
+        from .training import TrainingSetBuilder
+        
+        User = get_user_model()
+        student_class = Class.objects.create(
+            name='Training Class',
+            grade=10,
+            section='A',
+            academic_year='2023-24'
+        )
+        math = Subject.objects.create(name='Math', code='MATH')
+        for i, enrollment_status in enumerate(['graduated', 'dropped_out', 'active']):
+            student = Student.objects.create(
+                user=User.objects.create_user(username=f'training{i}', user_type='student'),
+                roll_number=f'TR{i:03d}',
+                student_class=student_class,
+                admission_date='2023-01-01',
+                parent_name='Test Parent',
+                parent_phone='+1234567890',
+                address='Test Address',
+                enrollment_status=enrollment_status
+            )
+            Attendance.objects.create(
+                student=student,
+                subject=math,
+                date=date(2023, 3, 1),
+                status='absent' if enrollment_status == 'dropped_out' else 'present'
+            )
+        
+        builder = TrainingSetBuilder(chunk_size=1)
+        X, y = builder.build()
+        
+        attendance = builder.feature_columns.index('attendance_percentage')
+        self.assertEqual(X.shape, (2, len(builder.feature_columns)))
+        self.assertEqual(list(y), [0, 1])
+        self.assertEqual(list(X[:, attendance]), [100.0, 0.0])
+
+class FeatureStoreTestCase(TestCase):
+    def test_snapshot_round_trip(self):
+        import tempfile
+        from django.contrib.auth import get_user_model
+        from apps.students.models import Class, Student
+        from .feature_store import FeatureStore
+        
+        User = get_user_model()
+        student_class = Class.objects.create(
+            name='Snapshot Class',
+            grade=10,
+            section='A',
+            academic_year='2024-25'
+        )
+        for i, enrollment_status in enumerate(['active', 'dropped_out']):
+            student = Student.objects.create(
+                user=User.objects.create_user(username=f'snapshot{i}', user_type='student'),
+                roll_number=f'SN{i:03d}',
+                student_class=student_class,
+                admission_date='2024-01-01',
+                parent_name='Test Parent',
+                parent_phone='+1234567890',
+                address='Test Address',
+                enrollment_status=enrollment_status
+            )
+            StudentAnalytics.objects.create(student=student, overall_gpa=1.5 + i)
+        
+        with tempfile.TemporaryDirectory() as base_dir:
+            store = FeatureStore(base_dir=base_dir)
+            store.write_snapshot('2024-06-01')
+            snapshot = store.load()
+            
+            gpa = snapshot.feature_columns.index('gpa')
+            self.assertEqual(len(snapshot), 2)
+            self.assertEqual(snapshot.row_for('SN001')[gpa], 2.5)
+            
+            X, y = snapshot.training_set()
+            self.assertEqual(X.shape[0], 1)
+            self.assertEqual(list(y), [1])
+
+class FlatTreeEnsembleTestCase(TestCase):
+    def setUp(self):
+        training_data, labels = make_training_data(n=300, seed=1)
+        self.X = DropoutPredictor().features_to_matrix(training_data)
+        self.y = np.array(labels)
+    
+    def assert_parity(self, model):
+        from .tree_inference import FlatTreeEnsemble
+        
+        model.fit(self.X, self.y)
+        flat = FlatTreeEnsemble.from_model(model)
+        
+        np.testing.assert_allclose(
+            flat.predict_proba(self.X, chunk_rows=64),
+            model.predict_proba(self.X)[:, 1],
+            rtol=1e-9,
+            atol=1e-12
+        )
+        np.testing.assert_allclose(
+            flat.predict_proba(self.X[:1]),
+            model.predict_proba(self.X[:1])[:, 1],
+            rtol=1e-9,
+            atol=1e-12
+        )
+    
+    def test_random_forest_parity(self):
+        from sklearn.ensemble import RandomForestClassifier
+        self.assert_parity(RandomForestClassifier(n_estimators=25, random_state=42))
+    
+    def test_gradient_boosting_parity(self):
+        from sklearn.ensemble import GradientBoostingClassifier
+        self.assert_parity(GradientBoostingClassifier(n_estimators=25, random_state=42))
+    
+    def test_forest_explanations_add_up_to_probability(self):
+        from sklearn.ensemble import RandomForestClassifier
+        from .tree_inference import FlatTreeEnsemble
+        
+        model = RandomForestClassifier(n_estimators=25, random_state=42).fit(self.X, self.y)
+        flat = FlatTreeEnsemble.from_model(model)
+        
+        contributions = flat.explain(self.X, self.X.shape[1])
+        bias = flat.leaf_value[flat.roots].mean()
+        
+        np.testing.assert_allclose(
+            contributions.sum(axis=1) + bias,
+            flat.predict_proba(self.X),
+            atol=1e-12
+        )
+    
+    def test_predict_batch_keeps_top_k_risk_factors(self):
+        predictor = DropoutPredictor()
+        predictor.train_model(*make_training_data(n=200, seed=2), n_jobs=1)
+        
+        batch = predictor.predict_batch(self.X[:5], explain_top_k=2)
+        
+        self.assertEqual(len(batch['risk_factors']), 5)
+        for factors in batch['risk_factors']:
+            self.assertEqual(len(factors), 2)
+            self.assertTrue(set(factors) <= set(predictor.feature_columns))
+
+class PredictionCacheTestCase(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from apps.students.models import Class, Student
+        from .ml_models import model_registry
+        from .models import PredictionModel
+        
+        cache.clear()
+        
+        predictor = DropoutPredictor()
+        predictor.train_model(*make_training_data(n=200, seed=3), n_jobs=1)
+        prediction_model = PredictionModel.objects.create(
+            name='Test Model',
+            version='1',
+            algorithm='random_forest',
+            accuracy=0.9,
+            is_active=True,
+            model_file_path='/nonexistent/model.joblib'
+        )
+        model_registry.activate(prediction_model, predictor)
+        
+        student_class = Class.objects.create(
+            name='Cache Class',
+            grade=10,
+            section='A',
+            academic_year='2024-25'
+        )
+        self.student = Student.objects.create(
+            user=get_user_model().objects.create_user(username='cached', user_type='student'),
+            roll_number='CA001',
+            student_class=student_class,
+            admission_date='2024-01-01',
+            parent_name='Test Parent',
+            parent_phone='+1234567890',
+            address='Test Address'
+        )
+        StudentAnalytics.objects.create(student=self.student, overall_attendance_percentage=55)
+    
+    def tearDown(self):
+        from django.core.cache import cache
+        from .ml_models import model_registry
+        
+        model_registry.clear()
+        cache.clear()
+    
+    def test_unchanged_features_skip_inference_and_insert(self):
+        from .ml_models import MLService, prediction_cache
+        from .models import DropoutPrediction
+        
+        first = MLService().predict_student_dropout(self.student)
+        second = MLService().predict_student_dropout(self.student)
+        
+        self.assertEqual(first, second)
+        self.assertEqual(DropoutPrediction.objects.filter(student=self.student).count(), 1)
+        self.assertEqual(prediction_cache.stats(), {'hits': 1, 'misses': 1})
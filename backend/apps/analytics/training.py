@@ -0,0 +1,103 @@
+import numpy as np
+from django.conf import settings
+from django.db.models import Avg, F
+from apps.students.models import Student, Assessment, StudentAttendanceRollup
+from .ml_models import DropoutPredictor, calculate_age
+
+# Enrollment outcomes that make a student usable as a labelled example
+OUTCOME_STATUSES = ['graduated', 'dropped_out']
+
+# Same defaults as MLService._build_features and FeatureStore; the other
+# features come from the same sources the analytics pipeline scores from
+DEFAULT_PARENT_EDUCATION_LEVEL = 2
+DEFAULT_FAMILY_INCOME_BRACKET = 2
+
+class _SortedStream:
+    """Look up per-student values from a query streamed in student_id order"""
+    
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._current = next(self._rows, None)
+    
+    def get(self, student_id):
+        while self._current is not None and self._current[0] < student_id:
+            self._current = next(self._rows, None)
+        if self._current is not None and self._current[0] == student_id:
+            return self._current
+        return None
+
+class TrainingSetBuilder:
+    """Build the labelled feature matrix for retraining in one streaming pass"""
+    
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or getattr(settings, 'TRAINING_CHUNK_SIZE', 2000)
+        self.feature_columns = DropoutPredictor().feature_columns
+    
+    def historical_students(self):
+        return Student.objects.filter(enrollment_status__in=OUTCOME_STATUSES)
+    
+    def _stream(self, queryset):
+        return _SortedStream(queryset.order_by('student_id').iterator(chunk_size=self.chunk_size))
+    
+    def build(self):
+        """Return (X, y): one feature row and dropout label per historical student"""
+        students = self.historical_students()
+        n_students = students.count()
+        
+        X = np.empty((n_students, len(self.feature_columns)), dtype=np.float64)
+        y = np.empty(n_students, dtype=np.int8)
+        
+        # Rollup counts and grouped aggregates, each streamed through a server-side cursor
+        attendance = self._stream(
+            StudentAttendanceRollup.objects.filter(student__in=students).values_list(
+                'student_id', 'total_classes', F('present') + F('late')
+            )
+        )
+        marks = self._stream(
+            Assessment.objects.filter(student__in=students).values('student_id').annotate(
+                avg_marks=Avg('obtained_marks')
+            ).values_list('student_id', 'avg_marks')
+        )
+        
+        rows = students.order_by('id').values_list(
+            'id',
+            'enrollment_status',
+            'user__profile__date_of_birth',
+            'studentanalytics__consecutive_absences',
+            'studentanalytics__failing_subjects_count',
+            'studentanalytics__late_submissions',
+            'studentanalytics__overdue_payments'
+        ).iterator(chunk_size=self.chunk_size)
+        
+        column = {name: index for index, name in enumerate(self.feature_columns)}
+        
+        i = 0
+        for student_id, status, birth_date, absences, failing, late, overdue in rows:
+            if i >= n_students:
+                break
+            
+            row = X[i]
+            
+            counts = attendance.get(student_id)
+            row[column['attendance_percentage']] = (
+                (counts[2] / counts[1]) * 100 if counts and counts[1] else 0
+            )
+            
+            avg_marks = marks.get(student_id)
+            row[column['gpa']] = (
+                min((avg_marks[1] / 100) * 4.0, 4.0) if avg_marks and avg_marks[1] is not None else 0
+            )
+            
+            row[column['consecutive_absences']] = absences or 0
+            row[column['failing_subjects']] = failing or 0
+            row[column['late_submissions']] = late or 0
+            row[column['fee_overdue_days']] = overdue or 0
+            row[column['age']] = calculate_age(birth_date)
+            row[column['parent_education_level']] = DEFAULT_PARENT_EDUCATION_LEVEL
+            row[column['family_income_bracket']] = DEFAULT_FAMILY_INCOME_BRACKET
+            
+            y[i] = status == 'dropped_out'
+            i += 1
+        
+        # Students removed between the count and the scan leave unused rows
+        return X[:i], y[:i]
@@ -0,0 +1,167 @@
+import numpy as np
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+class UnsupportedModelError(ValueError):
+    """Raised when a model cannot be flattened for fast inference"""
+
+class FlatTreeEnsemble:
+    """A fitted tree ensemble flattened into NumPy node arrays"""
+    
+    # All trees share one set of node arrays and leaves point back to
+    # themselves, so every row walks every tree for max_depth steps with a
+    # handful of vectorized operations and no per-call sklearn validation
+    
+    def __init__(self, roots, feature, threshold, left, right, leaf_value, max_depth,
+                 kind, init_raw=0.0, learning_rate=1.0):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_value = leaf_value
+        self.max_depth = max_depth
+        self.kind = kind
+        self.init_raw = init_raw
+        self.learning_rate = learning_rate
+    
+    def to_dict(self):
+        """Constructor arguments as plain arrays and scalars, for a memory-mappable artifact"""
+        return {
+            'roots': self.roots,
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'leaf_value': self.leaf_value,
+            'max_depth': self.max_depth,
+            'kind': self.kind,
+            'init_raw': self.init_raw,
+            'learning_rate': self.learning_rate,
+        }
+    
+    @classmethod
+    def from_model(cls, model):
+        """Flatten a binary RandomForestClassifier or GradientBoostingClassifier"""
+        if isinstance(model, RandomForestClassifier):
+            if model.n_classes_ != 2:
+                raise UnsupportedModelError("Only binary classifiers are supported")
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            
+            def leaf_values(tree):
+                # Class 1 share of each node's class distribution (every node,
+                # not just leaves, so paths can be attributed)
+                value = tree.value[:, 0, :]
+                return value[:, 1] / value.sum(axis=1)
+            
+            return cls._build(trees, leaf_values, 'forest')
+        
+        if isinstance(model, GradientBoostingClassifier):
+            if model.n_classes_ != 2 or model.loss not in ('log_loss', 'deviance'):
+                raise UnsupportedModelError("Only binary log-loss gradient boosting is supported")
+            
+            if model.init_ == 'zero':
+                init_raw = 0.0
+            elif isinstance(model.init_, DummyClassifier) and model.init_.strategy == 'prior':
+                prior = model.init_.class_prior_[1]
+                init_raw = float(np.log(prior / (1 - prior)))
+            else:
+                raise UnsupportedModelError("Only prior or zero initial estimators are supported")
+            
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            return cls._build(
+                trees, lambda tree: tree.value[:, 0, 0], 'boosting',
+                init_raw=init_raw, learning_rate=model.learning_rate
+            )
+        
+        raise UnsupportedModelError(f"Unsupported model type: {type(model).__name__}")
+    
+    @classmethod
+    def _build(cls, trees, leaf_values, kind, **kwargs):
+        sizes = [tree.node_count for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        
+        feature = []
+        threshold = []
+        left = []
+        right = []
+        values = []
+        for offset, tree in zip(offsets, trees):
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count) + offset
+            
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            left.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            right.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            values.append(leaf_values(tree))
+        
+        return cls(
+            roots=offsets,
+            feature=np.concatenate(feature).astype(np.intp),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            left=np.concatenate(left).astype(np.intp),
+            right=np.concatenate(right).astype(np.intp),
+            leaf_value=np.concatenate(values).astype(np.float64),  # value of every node
+            max_depth=max(tree.max_depth for tree in trees),
+            kind=kind,
+            **kwargs
+        )
+    
+    def predict_proba(self, X, chunk_rows=8192):
+        """Probability of the positive class (dropout) for each row of X"""
+        # sklearn compares float32 feature values against the split thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[0] <= chunk_rows:
+            return self._predict_chunk(X)
+        
+        # Bound the (rows x trees) node index matrix for large batches
+        return np.concatenate([
+            self._predict_chunk(X[start:start + chunk_rows])
+            for start in range(0, X.shape[0], chunk_rows)
+        ])
+    
+    def _predict_chunk(self, X):
+        rows = np.arange(X.shape[0])[:, None]
+        
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        
+        leaf_values = self.leaf_value[nodes]
+        if self.kind == 'forest':
+            return leaf_values.mean(axis=1)
+        
+        raw = self.init_raw + self.learning_rate * leaf_values.sum(axis=1)
+        return 1.0 / (1.0 + np.exp(-raw))
+    
+    def explain(self, X, n_features, chunk_rows=8192):
+        """Per-row feature contributions to the model output (path attribution)"""
+        # Each split on a row's path credits the change in node value to the
+        # split feature, so contributions plus the root value add up to the
+        # model output: probability for a forest, log-odds for boosting
+        X = np.asarray(X, dtype=np.float32)
+        return np.concatenate([
+            self._explain_chunk(X[start:start + chunk_rows], n_features)
+            for start in range(0, max(X.shape[0], 1), chunk_rows)
+        ])[:X.shape[0]]
+    
+    def _explain_chunk(self, X, n_features):
+        rows = np.arange(X.shape[0])[:, None]
+        contributions = np.zeros((X.shape[0], n_features), dtype=np.float64)
+        
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            features = self.feature[nodes]
+            go_left = X[rows, features] <= self.threshold[nodes]
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            
+            # Leaves loop onto themselves and contribute nothing
+            delta = self.leaf_value[children] - self.leaf_value[nodes]
+            np.add.at(contributions, (np.broadcast_to(rows, features.shape), features), delta)
+            nodes = children
+        
+        if self.kind == 'forest':
+            return contributions / self.roots.shape[0]
+        return contributions * self.learning_rate
@@ -4,9 +4,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
 from datetime import timedelta
-from .models import DropoutPrediction, StudentAnalytics
+from .models import DropoutPrediction, LatestDropoutPrediction, StudentAnalytics
 from .serializers import DropoutPredictionSerializer, StudentAnalyticsSerializer
-from .ml_models import MLService
+from .ml_models import MLService, prediction_cache
+from apps.core.pagination import LeanListMixin, PredictionPagination
+from .dashboard import dashboard_snapshot
 
 class StudentAnalyticsView(generics.RetrieveAPIView):
     queryset = StudentAnalytics.objects.all()
@@ -14,19 +16,44 @@ class StudentAnalyticsView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     lookup_field = 'student__roll_number'
 
-class DropoutPredictionListView(generics.ListAPIView):
+class DropoutPredictionListView(LeanListMixin, generics.ListAPIView):
     serializer_class = DropoutPredictionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PredictionPagination
+    lean_fields = [
+        'id', 'student_id', 'student__roll_number', 'model_id', 'prediction_date',
+        'dropout_probability', 'confidence_score'
+    ]
+    
+    def latest_only(self):
+        return self.request.query_params.get('latest') in ('1', 'true')
     
     def get_queryset(self):
         user = self.request.user
         
+        # ?latest=true reads each student's current prediction from the latest
+        # table instead of searching the partitioned history
+        model = LatestDropoutPrediction if self.latest_only() else DropoutPrediction
+        
         if user.user_type == 'student':
             # Students can only see their own predictions
-            return DropoutPrediction.objects.filter(student__user=user)
+            queryset = model.objects.filter(student__user=user)
         else:
             # Teachers and admins can see all predictions
-            return DropoutPrediction.objects.all()
+            queryset = model.objects.all()
+        
+        return queryset.select_related('student__user', 'model')
+    
+    def get_lean_fields(self):
+        if self.latest_only():
+            # The latest table keeps the history row's id as prediction_id
+            return ['prediction_id' if field == 'id' else field for field in self.lean_fields]
+        return self.lean_fields
+    
+    def get_serializer(self, *args, **kwargs):
+        if self.latest_only() and args:
+            args = ([latest.as_prediction() for latest in args[0]], *args[1:])
+        return super().get_serializer(*args, **kwargs)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -45,7 +72,7 @@ def generate_prediction_view(request, roll_number):
             'prediction': prediction,
             'timestamp': timezone.now()
         })
-        
+    
     except Student.DoesNotExist:
         return Response(
             {'error': 'Student not found'},
@@ -57,41 +84,32 @@ def generate_prediction_view(request, roll_number):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def prediction_cache_stats_view(request):
+    """Get prediction cache hit/miss counters"""
+    stats = prediction_cache.stats()
+    total = stats['hits'] + stats['misses']
+    
+    return Response({
+        **stats,
+        'hit_rate': stats['hits'] / total if total else 0
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard_analytics_view(request):
     """Get comprehensive analytics for dashboard"""
-    from django.db.models import Count, Avg, Q
-    from apps.students.models import Student, Attendance, Assessment
+    snapshot = dashboard_snapshot.get()
+    etag = f'"{snapshot["etag"]}"'
     
-    # Overall statistics
-    total_students = Student.objects.count()
+    # Unchanged since the client's last load
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')]:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(snapshot['data'])
     
-    # Risk distribution
-    risk_distribution = Student.objects.values('current_risk_level').annotate(
-        count=Count('id')
-    )
-    
-    # Attendance trends (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_attendance = Attendance.objects.filter(
-        date__gte=thirty_days_ago
-    ).values('date').annotate(
-        present=Count('id', filter=Q(status='present')),
-        absent=Count('id', filter=Q(status='absent'))
-    ).order_by('date')
-    
-    # Academic performance trends
-    performance_trends = Assessment.objects.filter(
-        date_conducted__gte=thirty_days_ago
-    ).values('subject__name').annotate(
-        avg_percentage=Avg('obtained_marks')
-    )
-    
-    return Response({
-        'total_students': total_students,
-        'risk_distribution': list(risk_distribution),
-        'attendance_trends': list(recent_attendance),
-        'performance_trends': list(performance_trends),
-        'last_updated': timezone.now()
-    })
\ No newline at end of file
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -28,6 +28,9 @@ class ChatMessage(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['session', 'timestamp', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.message_type}: {self.content[:50]}..."
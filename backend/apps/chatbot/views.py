@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from .models import ChatSession, ChatMessage
 from .serializers import ChatMessageSerializer, ChatSessionSerializer
 from .chatbot_service import ChatbotService
+from apps.core.pagination import LeanListMixin, ChatMessagePagination
 
 class ChatSessionListView(generics.ListAPIView):
     serializer_class = ChatSessionSerializer
@@ -13,9 +14,11 @@ class ChatSessionListView(generics.ListAPIView):
     def get_queryset(self):
         return ChatSession.objects.filter(user=self.request.user)
 
-class ChatMessageListView(generics.ListAPIView):
+class ChatMessageListView(LeanListMixin, generics.ListAPIView):
     serializer_class = ChatMessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ChatMessagePagination
+    lean_fields = ['id', 'message_type', 'content', 'timestamp']
     
     def get_queryset(self):
         session_id = self.kwargs['session_id']
@@ -0,0 +1,266 @@
+import json
+import time
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+User = get_user_model()
+
+# Maximum queries per call of the batch code paths behind the scheduled tasks,
+# for up to one write batch (1000) of students
+CODE_PATH_BUDGETS = {
+    'analytics.pipeline': 9,
+    'analytics.prediction_writer': 5,
+    'analytics.dashboard_build': 4,
+    'notifications.attendance_alerts': 3,
+    'notifications.dispatch': 6,
+}
+
+# Maximum queries per request. Budgets do not grow with the institution size,
+# so an N+1 query shows up as soon as a page holds more than one row.
+ENDPOINT_BUDGETS = {
+    'accounts.login': 6,
+    'accounts.profile': 2,
+    'students.list': 3,
+    'students.list_lean': 2,
+    'students.detail': 2,
+    'students.risk_summary': 1,
+    'students.upload_status': 1,
+    'analytics.student_analytics': 2,
+    'analytics.predictions': 3,
+    'analytics.predictions_latest': 3,
+    'analytics.dashboard': 1,
+    'analytics.prediction_cache_stats': 0,
+    'chatbot.sessions': 2,
+    'chatbot.messages': 2,
+}
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+def timed(func, *args, **kwargs):
+    """Call func and return (result, elapsed seconds)"""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+class BenchmarkSuite:
+    """Seed a synthetic institution, then measure query counts and pipeline timings"""
+    
+    def __init__(self, students=200, subjects=5, days=20, seed=0, score=True):
+        self.config = {'students': students, 'subjects': subjects, 'days': days, 'seed': seed}
+        self.score = score
+        self.report = {
+            'config': self.config, 'code_paths': {}, 'endpoints': {}, 'timings': {},
+            'skipped': {}, 'failures': []
+        }
+    
+    def run(self):
+        """Run every benchmark and return the report"""
+        from apps.students.synthetic import SyntheticInstitution
+        
+        institution = SyntheticInstitution(
+            students=self.config['students'],
+            subjects=self.config['subjects'],
+            days=self.config['days'],
+            seed=self.config['seed'],
+            prefix='BENCH'
+        )
+        counts, self.report['timings']['seed'] = timed(institution.generate)
+        self.report['rows'] = counts
+        self.next_day = institution.end_date
+        
+        if self.score:
+            self.activate_model('benchmark-1')
+        self.time_pipelines()
+        self.measure_code_paths()
+        self.measure_endpoints()
+        
+        measured = dict(self.report['code_paths'], **self.report['endpoints'])
+        self.report['failures'] = [
+            name for name, result in sorted(measured.items())
+            if result['queries'] > result['budget']
+        ]
+        return self.report
+    
+    def to_json(self):
+        """Stable, diffable JSON for comparing reports between commits"""
+        return json.dumps(self.report, indent=2, sort_keys=True, default=str)
+    
+    def activate_model(self, version):
+        from apps.analytics.ml_models import DropoutPredictor, model_registry
+        from apps.analytics.models import PredictionModel
+        from apps.analytics.training import TrainingSetBuilder
+        
+        if not hasattr(self, 'predictor'):
+            X, y = TrainingSetBuilder().build()
+            self.predictor = DropoutPredictor()
+            self.report['timings']['training'] = timed(self.predictor.train_model, X, y)[1]
+        
+        PredictionModel.objects.filter(is_active=True).update(is_active=False)
+        prediction_model = PredictionModel.objects.create(
+            name='Benchmark Model',
+            version=version,
+            algorithm=self.predictor.metrics['algorithm'],
+            accuracy=self.predictor.metrics['accuracy'],
+            is_active=True,
+            model_file_path=''
+        )
+        model_registry.activate(prediction_model, self.predictor)
+    
+    def time_pipelines(self):
+        from apps.analytics.ml_models import MLService
+        from apps.analytics.tasks import update_student_analytics
+        from apps.students.ingest import UploadIngestor
+        from apps.students.models import Student, Subject
+        
+        timings = self.report['timings']
+        timings['update_student_analytics'] = timed(update_student_analytics, full=True)[1]
+        
+        if self.score:
+            students = list(Student.objects.select_related('user__profile'))
+            # A fresh model version misses the prediction cache filled above
+            self.activate_model('benchmark-2')
+            timings['batch_scoring_cold'] = timed(MLService().predict_students_dropout, students)[1]
+            timings['batch_scoring_warm'] = timed(MLService().predict_students_dropout, students)[1]
+        
+        rows = ['roll_number,subject_code,date,status']
+        subject_codes = list(Subject.objects.filter(code__startswith='BENCH').values_list('code', flat=True))
+        for roll_number in Student.objects.values_list('roll_number', flat=True):
+            for code in subject_codes:
+                rows.append(f'{roll_number},{code},{self.next_day},present')
+        ingestor = UploadIngestor('attendance')
+        timings['upload_ingest'] = timed(ingestor.ingest, StringIO('\n'.join(rows)), 'attendance.csv')[1]
+        timings['upload_ingest_rows'] = len(rows) - 1
+    
+    def _measure(self, budget, func, *args, **kwargs):
+        """Call func, returning its result and a query count and timing entry"""
+        with CaptureQueriesContext(connection) as queries:
+            result, elapsed = timed(func, *args, **kwargs)
+            if hasattr(result, 'render'):
+                result.render()
+        
+        return result, {'queries': len(queries), 'budget': budget, 'seconds': elapsed}
+    
+    def measure_code_paths(self):
+        """Query counts of the batch paths, which import without the API views"""
+        from apps.analytics.dashboard import dashboard_snapshot
+        from apps.analytics.ml_models import PredictionWriter
+        from apps.analytics.models import PredictionModel
+        from apps.analytics.pipeline import AnalyticsPipeline
+        from apps.notifications.alerts import AttendanceAlertPlanner
+        from apps.notifications.dispatch import SMSDispatcher
+        from apps.notifications.models import NotificationTemplate
+        from apps.notifications.queue import NotificationQueue
+        from apps.notifications.rendering import template_cache
+        from apps.notifications.sms_service import FakeSMSProvider, SMSService
+        from apps.students.models import Student
+        
+        code_paths = self.report['code_paths']
+        
+        def measure(name, func, *args, **kwargs):
+            result, code_paths[name] = self._measure(CODE_PATH_BUDGETS[name], func, *args, **kwargs)
+            return result
+        
+        measure('analytics.pipeline', AnalyticsPipeline().run)
+        
+        # A model version with no stored predictions, so every row is written
+        writer_model = PredictionModel.objects.create(
+            name='Benchmark Writer Model',
+            version='benchmark-writer',
+            algorithm='none',
+            accuracy=0,
+            is_active=False,
+            model_file_path=''
+        )
+        students = list(Student.objects.order_by('id')[:1000])
+        
+        def write_predictions():
+            with PredictionWriter(writer_model.id) as writer:
+                for student in students:
+                    writer.add(student, {'dropout_probability': 0.5, 'risk_level': 'medium', 'risk_factors': {}})
+        
+        measure('analytics.prediction_writer', write_predictions)
+        measure('analytics.dashboard_build', dashboard_snapshot.build)
+        
+        NotificationTemplate.objects.create(
+            name='Benchmark Attendance',
+            template_type='attendance_warning',
+            message_template='{student_name} attendance is {attendance_percentage}%'
+        )
+        template_cache.invalidate()
+        measure('notifications.attendance_alerts', AttendanceAlertPlanner(threshold=101).enqueue)
+        
+        queue = NotificationQueue(coalesce_window=0)
+        dispatcher = SMSDispatcher(sms_service=SMSService(FakeSMSProvider()), rate=1000000)
+        
+        def send_batch():
+            # One leased batch, as one iteration of process_pending_notifications
+            return dispatcher.dispatch(queue.claim(), queue)
+        
+        measure('notifications.dispatch', send_batch)
+    
+    def endpoints(self, teacher):
+        """(name, view, method, data, view kwargs) for every measured endpoint"""
+        from apps.accounts.views import LoginView, ProfileView
+        from apps.analytics import views as analytics_views
+        from apps.chatbot.views import ChatSessionListView, ChatMessageListView
+        from apps.chatbot.models import ChatSession, ChatMessage
+        from apps.students import views as student_views
+        from apps.students.models import Student, UploadJob
+        
+        student = Student.objects.order_by('id').first()
+        session = ChatSession.objects.create(user=teacher, session_id=f'benchmark-{teacher.id}')
+        ChatMessage.objects.bulk_create([
+            ChatMessage(session=session, message_type='user' if i % 2 else 'bot', content=f'Message {i}')
+            for i in range(40)
+        ])
+        job = UploadJob.objects.create(data_type='attendance', file='uploads/benchmark.csv', uploaded_by=teacher)
+        
+        return [
+            ('accounts.login', LoginView.as_view(), 'post',
+             {'username': teacher.username, 'password': BENCHMARK_PASSWORD}, {}),
+            ('accounts.profile', ProfileView.as_view(), 'get', None, {}),
+            ('students.list', student_views.StudentListView.as_view(), 'get', None, {}),
+            ('students.list_lean', student_views.StudentListView.as_view(), 'get', {'lean': 'true'}, {}),
+            ('students.detail', student_views.StudentDetailView.as_view(), 'get', None,
+             {'roll_number': student.roll_number}),
+            ('students.risk_summary', student_views.risk_summary_view, 'get', None, {}),
+            ('students.upload_status', student_views.upload_status_view, 'get', None,
+             {'job_id': str(job.job_id)}),
+            ('analytics.student_analytics', analytics_views.StudentAnalyticsView.as_view(), 'get', None,
+             {'student__roll_number': student.roll_number}),
+            ('analytics.predictions', analytics_views.DropoutPredictionListView.as_view(), 'get', None, {}),
+            ('analytics.predictions_latest', analytics_views.DropoutPredictionListView.as_view(), 'get',
+             {'latest': 'true'}, {}),
+            ('analytics.dashboard', analytics_views.dashboard_analytics_view, 'get', None, {}),
+            ('analytics.prediction_cache_stats', analytics_views.prediction_cache_stats_view, 'get', None, {}),
+            ('chatbot.sessions', ChatSessionListView.as_view(), 'get', None, {}),
+            ('chatbot.messages', ChatMessageListView.as_view(), 'get', None,
+             {'session_id': session.session_id}),
+        ]
+    
+    def measure_endpoints(self):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from apps.analytics.dashboard import dashboard_snapshot
+        
+        teacher = User.objects.create_user(
+            username='benchmark_teacher', password=BENCHMARK_PASSWORD, user_type='teacher'
+        )
+        dashboard_snapshot.refresh()
+        
+        try:
+            endpoints = self.endpoints(teacher)
+        except ImportError as e:
+            # The API views need serializer and permission modules; report the
+            # endpoints as skipped rather than failing the code path budgets
+            self.report['skipped']['endpoints'] = str(e)
+            return
+        
+        factory = APIRequestFactory()
+        for name, view, method, data, kwargs in endpoints:
+            request = getattr(factory, method)('/', data)
+            force_authenticate(request, user=teacher)
+            
+            response, result = self._measure(ENDPOINT_BUDGETS[name], view, request, **kwargs)
+            self.report['endpoints'][name] = dict(result, status=response.status_code)
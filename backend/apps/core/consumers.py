@@ -76,6 +76,36 @@ class DashboardConsumer(AsyncWebsocketConsumer):
             'data': event['data']
         }))
 
+class UploadProgressConsumer(AsyncWebsocketConsumer):
+    async def connect(self):
+        self.user = self.scope["user"]
+        
+        if self.user.is_authenticated and self.user.user_type in ['teacher', 'admin']:
+            self.room_group_name = f"upload_{self.scope['url_route']['kwargs']['job_id']}"
+            
+            await self.channel_layer.group_add(
+                self.room_group_name,
+                self.channel_name
+            )
+            
+            await self.accept()
+        else:
+            await self.close()
+    
+    async def disconnect(self, close_code):
+        if hasattr(self, 'room_group_name'):
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
+    
+    async def upload_progress(self, event):
+        """Send upload job progress"""
+        await self.send(text_data=json.dumps({
+            'type': 'upload_progress',
+            'data': event['data']
+        }))
+
 # Signal handlers for real-time updates
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.core.benchmarks import BenchmarkSuite
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic institution and report query counts and pipeline timings as JSON'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--subjects', type=int, default=5)
+        parser.add_argument('--days', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument(
+            '--no-score',
+            action='store_true',
+            help='Skip model training and batch scoring'
+        )
+        parser.add_argument(
+            '--keep-data',
+            action='store_true',
+            help='Commit the seeded rows instead of rolling them back'
+        )
+    
+    def handle(self, *args, **options):
+        from apps.analytics.dashboard import dashboard_snapshot
+        from apps.analytics.ml_models import model_registry
+        
+        suite = BenchmarkSuite(
+            students=options['students'],
+            subjects=options['subjects'],
+            days=options['days'],
+            seed=options['seed'],
+            score=not options['no_score']
+        )
+        
+        with transaction.atomic():
+            report = suite.run()
+            if not options['keep_data']:
+                transaction.set_rollback(True)
+        
+        if not options['keep_data']:
+            # The cache outlives the rolled-back rows
+            model_registry.clear()
+            dashboard_snapshot.invalidate()
+        
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(suite.to_json())
+            self.stdout.write(f"Wrote benchmark report to {options['output']}")
+        else:
+            self.stdout.write(suite.to_json())
+        
+        for section, reason in report['skipped'].items():
+            self.stderr.write(self.style.WARNING(f"Skipped {section}: {reason}"))
+        
+        if report['failures']:
+            raise CommandError(f"Query budget exceeded: {', '.join(report['failures'])}")
+        self.stdout.write(self.style.SUCCESS('All measured code paths and endpoints within their query budgets'))
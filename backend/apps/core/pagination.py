@@ -0,0 +1,62 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination on a stable ordering, without COUNT(*) unless asked for"""
+    
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    count_query_param = 'count'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+    
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        # Rows sharing the cursor field's value are skipped by offset, which
+        # only holds when the order within those ties is fixed
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering += ('id',)
+        return ordering
+    
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        }
+        if self.count is not None:
+            response['count'] = self.count
+        return Response(response)
+
+class StudentPagination(KeysetPagination):
+    ordering = 'roll_number'
+
+class PredictionPagination(KeysetPagination):
+    ordering = ('-prediction_date', '-id')
+
+class ChatMessagePagination(KeysetPagination):
+    ordering = ('timestamp', 'id')
+
+class LeanListMixin:
+    """Serve ?lean=true list requests straight from values(), skipping the serializer"""
+    
+    lean_fields = None
+    
+    def get_lean_fields(self):
+        return self.lean_fields
+    
+    def list(self, request, *args, **kwargs):
+        lean_fields = self.get_lean_fields()
+        if not lean_fields or request.query_params.get('lean') not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset()).values(*lean_fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(list(page))
+        return Response(list(queryset))
@@ -4,4 +4,5 @@ from . import consumers
 websocket_urlpatterns = [
     re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
     re_path(r'ws/dashboard/$', consumers.DashboardConsumer.as_asgi()),
+    re_path(r'ws/uploads/(?P<job_id>[0-9a-f-]+)/$', consumers.UploadProgressConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -1,3 +1,116 @@
 from django.test import TestCase
+from .benchmarks import BenchmarkSuite, CODE_PATH_BUDGETS, ENDPOINT_BUDGETS
 
-# Create your tests here.
+class QueryBudgetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.report = BenchmarkSuite(students=100, subjects=3, days=10).run()
+    
+    @classmethod
+    def tearDownClass(cls):
+        from apps.analytics.ml_models import model_registry
+        model_registry.clear()
+        super().tearDownClass()
+    
+    def test_code_paths_stay_within_query_budgets(self):
+        self.assertEqual(set(self.report['code_paths']), set(CODE_PATH_BUDGETS))
+        for name, result in self.report['code_paths'].items():
+            self.assertLessEqual(result['queries'], result['budget'], name)
+        
+        for timing in ['update_student_analytics', 'batch_scoring_cold', 'upload_ingest']:
+            self.assertIn(timing, self.report['timings'])
+        self.assertEqual(self.report['timings']['upload_ingest_rows'], 100 * 3)
+    
+    def test_endpoints_stay_within_query_budgets(self):
+        if 'endpoints' in self.report['skipped']:
+            self.skipTest(f"API views cannot be imported: {self.report['skipped']['endpoints']}")
+        
+        self.assertEqual(set(self.report['endpoints']), set(ENDPOINT_BUDGETS))
+        for name, result in self.report['endpoints'].items():
+            self.assertLess(result['status'], 400, name)
+            self.assertLessEqual(result['queries'], result['budget'], name)
+
+def student_list_view():
+    """A lean, keyset-paginated student list with no auth, for exercising the pagination"""
+    from rest_framework import filters, generics, serializers
+    from apps.students.models import Student
+    from .pagination import LeanListMixin, StudentPagination
+    
+    class StudentRollSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = Student
+            fields = ['id', 'roll_number']
+    
+    class StudentListView(LeanListMixin, generics.ListAPIView):
+        queryset = Student.objects.all()
+        serializer_class = StudentRollSerializer
+        pagination_class = StudentPagination
+        authentication_classes = []
+        permission_classes = []
+        filter_backends = [filters.OrderingFilter]
+        ordering_fields = ['roll_number', 'risk_score']
+        ordering = 'roll_number'
+        lean_fields = ['roll_number', 'parent_name']
+    
+    return StudentListView.as_view()
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from apps.students.models import Class, Student
+        
+        student_class = Class.objects.create(
+            name='Science', grade=10, section='B', academic_year='2024-25'
+        )
+        for i in range(3):
+            Student.objects.create(
+                user=get_user_model().objects.create_user(username=f'paged{i}', user_type='student'),
+                roll_number=f'P00{i}',
+                student_class=student_class,
+                admission_date='2024-01-15',
+                parent_name='Parent',
+                parent_phone='+1234567890',
+                address='Test Address'
+            )
+        self.view = student_list_view()
+    
+    def _get(self, path='/students/', data=None):
+        from rest_framework.test import APIRequestFactory
+        
+        response = self.view(APIRequestFactory().get(path, data))
+        self.assertEqual(response.status_code, 200)
+        return response
+    
+    def test_lean_pages_follow_cursor(self):
+        response = self._get(data={'page_size': 2, 'lean': 'true'})
+        
+        self.assertNotIn('count', response.data)
+        self.assertEqual(
+            response.data['results'],
+            [{'roll_number': 'P000', 'parent_name': 'Parent'}, {'roll_number': 'P001', 'parent_name': 'Parent'}]
+        )
+        
+        response = self._get(response.data['next'])
+        self.assertEqual([row['roll_number'] for row in response.data['results']], ['P002'])
+        self.assertIsNone(response.data['next'])
+    
+    def test_serialized_page_counts_only_on_request(self):
+        with self.assertNumQueries(1):
+            response = self._get(data={'page_size': 2})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'roll_number'})
+        
+        response = self._get(data={'page_size': 2, 'count': 'true'})
+        self.assertEqual(response.data['count'], 3)
+    
+    def test_non_unique_ordering_pages_through_ties(self):
+        seen = []
+        response = self._get(data={'page_size': 1, 'ordering': '-risk_score', 'lean': 'true'})
+        while True:
+            seen.extend(row['roll_number'] for row in response.data['results'])
+            if response.data['next'] is None:
+                break
+            response = self._get(response.data['next'])
+        
+        # Every student shares risk_score 0.0; the id tiebreaker keeps pages disjoint
+        self.assertEqual(seen, ['P000', 'P001', 'P002'])
@@ -0,0 +1,95 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from apps.students.models import Student
+from .models import Notification
+from .rendering import MessageRenderer, template_cache
+
+def day_start(day):
+    """Aware start of a local calendar day"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+class AlertPlanner(ABC):
+    """Plan one alert per student who needs one and has not had one recently"""
+    
+    template_type = None
+    
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+    
+    @abstractmethod
+    def candidates(self):
+        """Students who qualify for this alert"""
+    
+    @abstractmethod
+    def dedup_since(self):
+        """An alert of this type created since then suppresses a new one"""
+    
+    def context(self, student):
+        return {}
+    
+    def students(self):
+        """Candidates with no alert of this type in the dedup window"""
+        already_alerted = Notification.objects.filter(
+            student=OuterRef('pk'),
+            template__template_type=self.template_type,
+            created_at__gte=self.dedup_since()
+        )
+        return self.candidates().filter(~Exists(already_alerted))
+    
+    def plan(self, template):
+        """Unsaved pending notifications, one per student needing an alert"""
+        renderer = MessageRenderer(template)
+        return list(renderer.render_queryset(
+            self.students(), student_path=None, context=self.context, chunk_size=self.batch_size
+        ))
+    
+    def enqueue(self):
+        """Insert alerts for the dispatch queue; return how many were queued"""
+        notifications = self.plan(template_cache.get(self.template_type))
+        Notification.objects.bulk_create(notifications, batch_size=self.batch_size)
+        return len(notifications)
+
+class RiskAlertPlanner(AlertPlanner):
+    """At most one risk alert per high-risk student per day"""
+    
+    template_type = 'risk_alert'
+    
+    def __init__(self, day=None, risk_level='high', batch_size=1000):
+        super().__init__(batch_size)
+        self.day = day or timezone.localdate()
+        self.risk_level = risk_level
+    
+    def candidates(self):
+        return Student.objects.filter(current_risk_level=self.risk_level)
+    
+    def dedup_since(self):
+        return day_start(self.day)
+    
+    def context(self, student):
+        return {'risk_level': self.risk_level.upper()}
+
+class AttendanceAlertPlanner(AlertPlanner):
+    """At most one attendance warning per student every `interval_days`"""
+    
+    template_type = 'attendance_warning'
+    
+    def __init__(self, threshold=75, interval_days=None, batch_size=1000):
+        super().__init__(batch_size)
+        self.threshold = threshold
+        self.interval = timedelta(days=interval_days or getattr(
+            settings, 'NOTIFICATION_ATTENDANCE_ALERT_INTERVAL_DAYS', 7
+        ))
+    
+    def candidates(self):
+        return Student.objects.filter(
+            studentanalytics__overall_attendance_percentage__lt=self.threshold
+        ).annotate(attendance_percentage=F('studentanalytics__overall_attendance_percentage'))
+    
+    def dedup_since(self):
+        return timezone.now() - self.interval
+    
+    def context(self, student):
+        return {'attendance_percentage': student.attendance_percentage}
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+from .models import Notification
+from .rendering import SCHOOL_NAME
+
+def digest_message(contents):
+    """One SMS body carrying several notification messages"""
+    return f"{len(contents)} updates from {SCHOOL_NAME}:\n" + "\n".join(f"- {content}" for content in contents)
+
+class NotificationCoalescer:
+    """Merge each recipient's pending notifications into one digest and hold quiet periods"""
+    
+    def __init__(self, window=None, quiet_period=None, batch_size=500):
+        if window is None:
+            window = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 300)
+        if quiet_period is None:
+            quiet_period = getattr(settings, 'NOTIFICATION_QUIET_PERIOD', 3600)
+        self.window = timedelta(seconds=window)
+        self.quiet_period = timedelta(seconds=quiet_period)
+        self.batch_size = batch_size
+    
+    def pending(self, now):
+        """Pending notifications not leased to a sending worker"""
+        return Notification.objects.filter(status='pending').filter(
+            Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+        )
+    
+    def due_phones(self, now):
+        """Recipients whose oldest pending notification has waited out the window"""
+        return list(
+            self.pending(now).values('recipient_phone').annotate(
+                oldest=Min('created_at')
+            ).filter(oldest__lte=now - self.window).order_by().values_list('recipient_phone', flat=True)
+        )
+    
+    def quiet_until(self, phones, now):
+        """Map phone -> end of its quiet period, for recipients messaged recently"""
+        if not self.quiet_period:
+            return {}
+        
+        recent = Notification.objects.filter(
+            recipient_phone__in=phones, status='sent', sent_at__gt=now - self.quiet_period
+        ).values('recipient_phone').annotate(last_sent=Max('sent_at')).order_by()
+        return {row['recipient_phone']: row['last_sent'] + self.quiet_period for row in recent}
+    
+    def run(self):
+        """Coalesce every due recipient; return digest, merge and hold counts"""
+        now = timezone.now()
+        phones = self.due_phones(now)
+        
+        totals = {'digests': 0, 'merged': 0, 'held': 0}
+        for start in range(0, len(phones), self.batch_size):
+            for key, count in self.coalesce(phones[start:start + self.batch_size], now).items():
+                totals[key] += count
+        return totals
+    
+    def coalesce(self, phones, now):
+        with transaction.atomic():
+            # Rows a worker is claiming right now are left for the next run
+            rows = list(
+                self.pending(now).filter(recipient_phone__in=phones).order_by(
+                    'created_at', 'id'
+                ).select_for_update(skip_locked=True)
+            )
+            quiet_until = self.quiet_until(phones, now)
+            
+            # Messages already folded into a pending digest get re-digested with the new ones
+            children = {}
+            for child in Notification.objects.filter(
+                digest__in=[row for row in rows if row.is_digest]
+            ).order_by('created_at', 'id'):
+                children.setdefault(child.digest_id, []).append(child)
+            
+            groups = {}
+            for row in rows:
+                groups.setdefault(row.recipient_phone, []).append(row)
+            
+            digests = []
+            held = []
+            for phone, group in groups.items():
+                if len(group) == 1:
+                    row = group[0]
+                    if phone in quiet_until and row.next_attempt_at != quiet_until[phone]:
+                        row.next_attempt_at = quiet_until[phone]
+                        held.append(row)
+                    continue
+                
+                originals = []
+                for row in group:
+                    originals.extend(children.get(row.id, []) if row.is_digest else [row])
+                originals.sort(key=lambda row: (row.created_at, row.id))
+                
+                digest = Notification(
+                    student_id=originals[0].student_id,
+                    template_id=originals[0].template_id,
+                    recipient_phone=phone,
+                    message_content=digest_message([row.message_content for row in originals]),
+                    status='pending',
+                    is_digest=True,
+                    next_attempt_at=quiet_until.get(phone)
+                )
+                # Old digests and their children are repointed at the new digest
+                digests.append((digest, group + [
+                    child for row in group if row.is_digest for child in children.get(row.id, [])
+                ], len(originals)))
+            
+            Notification.objects.bulk_create([digest for digest, rows_to_merge, messages in digests])
+            
+            merged = []
+            for digest, rows_to_merge, messages in digests:
+                for row in rows_to_merge:
+                    row.status = 'merged'
+                    row.digest = digest
+                merged.extend(rows_to_merge)
+            
+            Notification.objects.bulk_update(merged, ['status', 'digest'], batch_size=self.batch_size)
+            Notification.objects.bulk_update(held, ['next_attempt_at'], batch_size=self.batch_size)
+        
+        return {
+            'digests': len(digests),
+            'merged': sum(messages for digest, rows_to_merge, messages in digests),
+            'held': len(held) + sum(1 for digest, rows_to_merge, messages in digests if digest.next_attempt_at),
+        }
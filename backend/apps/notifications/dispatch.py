@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.utils import timezone
+from .models import Notification
+from .sms_service import SMSService
+
+# Notification columns written back after a send attempt
+STATUS_FIELDS = ['status', 'sent_at', 'delivery_status']
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` sends per second with bursts up to `capacity`"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class SMSDispatcher:
+    """Send notifications with bounded concurrency under the provider's rate limit"""
+    
+    def __init__(self, sms_service=None, max_workers=None, rate=None, burst=None, batch_size=500):
+        self.sms_service = sms_service or SMSService()
+        self.max_workers = max_workers or getattr(settings, 'SMS_DISPATCH_WORKERS', 16)
+        self.bucket = TokenBucket(
+            rate or getattr(settings, 'SMS_RATE_PER_SECOND', 10),
+            burst or getattr(settings, 'SMS_RATE_BURST', None)
+        )
+        self.batch_size = batch_size
+    
+    def _send(self, notification):
+        self.bucket.acquire()
+        return self.sms_service.send_sms(notification.recipient_phone, notification.message_content)
+    
+    def dispatch(self, notifications, queue=None):
+        """Send every notification, write outcomes back in bulk and release queue leases"""
+        notifications = list(notifications)
+        if not notifications:
+            return {'sent': 0, 'failed': 0}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._send, notifications))
+        
+        counts = {'sent': 0, 'failed': 0}
+        for notification, result in zip(notifications, results):
+            if result['success']:
+                notification.status = 'sent'
+                notification.sent_at = timezone.now()
+                notification.delivery_status = result.get('status', '')
+            else:
+                notification.status = 'failed'
+                notification.delivery_status = result.get('error', '')[:50]
+            counts[notification.status] += 1
+            
+            if queue is not None:
+                queue.release(notification)
+        
+        fields = STATUS_FIELDS + (queue.LEASE_FIELDS if queue is not None else [])
+        Notification.objects.bulk_update(notifications, fields, batch_size=self.batch_size)
+        return counts
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from apps.students.models import Student
 
 class NotificationTemplate(models.Model):
@@ -23,6 +25,7 @@ class Notification(models.Model):
         ('sent', 'Sent'),
         ('failed', 'Failed'),
         ('delivered', 'Delivered'),
+        ('merged', 'Merged into digest'),
     ]
     
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -34,74 +37,31 @@ class Notification(models.Model):
     sent_at = models.DateTimeField(null=True, blank=True)
     delivery_status = models.CharField(max_length=50, blank=True)
     
+    # Delivery queue lease and retry state
+    claimed_by = models.CharField(max_length=100, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    
+    # Digest coalescing: a digest carries the merged messages of one recipient
+    is_digest = models.BooleanField(default=False)
+    digest = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='merged_notifications'
+    )
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['student', 'created_at']),
+            models.Index(fields=['recipient_phone', 'status']),
+        ]
+    
     def __str__(self):
         return f"Notification to {self.recipient_phone} - {self.status}"
 
-# SMS Service
-class SMSService:
-    def __init__(self):
-        from twilio.rest import Client
-        from django.conf import settings
-        
-        self.client = Client(
-            settings.TWILIO_ACCOUNT_SID,
-            settings.TWILIO_AUTH_TOKEN
-        )
-        self.from_number = settings.TWILIO_PHONE_NUMBER
-    
-    def send_sms(self, to_number, message):
-        """Send SMS using Twilio"""
-        try:
-            message_instance = self.client.messages.create(
-                body=message,
-                from_=self.from_number,
-                to=to_number
-            )
-            
-            return {
-                'success': True,
-                'message_sid': message_instance.sid,
-                'status': message_instance.status
-            }
-            
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
-    
-    def send_risk_alert(self, student, risk_level):
-        """Send risk level alert to parents"""
-        try:
-            template = NotificationTemplate.objects.get(
-                template_type='risk_alert',
-                is_active=True
-            )
-            
-            message = template.message_template.format(
-                student_name=student.user.get_full_name(),
-                risk_level=risk_level.upper(),
-                school_name="Your School Name"
-            )
-            
-            # Send to parent
-            result = self.send_sms(student.parent_phone, message)
-            
-            # Create notification record
-            notification = Notification.objects.create(
-                student=student,
-                template=template,
-                recipient_phone=student.parent_phone,
-                message_content=message,
-                status='sent' if result['success'] else 'failed'
-            )
-            
-            if result['success']:
-                notification.sent_at = timezone.now()
-                notification.delivery_status = result['status']
-                notification.save()
-            
-            return result
-            
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
\ No newline at end of file
+@receiver([post_save, post_delete], sender=NotificationTemplate)
+def invalidate_template_cache(sender, instance, **kwargs):
+    """Drop cached templates so the next render sees the edit"""
+    from .rendering import template_cache
+    template_cache.invalidate()
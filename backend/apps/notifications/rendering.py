@@ -0,0 +1,84 @@
+from string import Formatter
+from django.conf import settings
+from .models import Notification, NotificationTemplate
+
+SCHOOL_NAME = "Your School Name"
+
+class TemplateCache:
+    """Active notification templates by type, cached until a template is saved or deleted"""
+    
+    CACHE_PREFIX = 'notifications:template:'
+    
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'NOTIFICATION_TEMPLATE_CACHE_TIMEOUT', 3600)
+    
+    def _key(self, template_type):
+        return f'{self.CACHE_PREFIX}{template_type}'
+    
+    def get(self, template_type):
+        """The active template of a type; raises NotificationTemplate.DoesNotExist"""
+        from django.core.cache import cache
+        
+        data = cache.get(self._key(template_type))
+        if data is None:
+            template = NotificationTemplate.objects.get(template_type=template_type, is_active=True)
+            data = {
+                'id': template.id,
+                'name': template.name,
+                'template_type': template.template_type,
+                'message_template': template.message_template,
+                'is_active': template.is_active,
+            }
+            cache.set(self._key(template_type), data, self.timeout)
+        
+        return NotificationTemplate(**data)
+    
+    def invalidate(self):
+        """Forget every cached template type"""
+        from django.core.cache import cache
+        
+        cache.delete_many([
+            self._key(template_type) for template_type, label in NotificationTemplate.TEMPLATE_TYPES
+        ])
+
+template_cache = TemplateCache()
+
+class MessageRenderer:
+    """Render one template for many students with its placeholders parsed once"""
+    
+    def __init__(self, template, **context):
+        self.template = template
+        self.fields = {
+            field for literal, field, spec, conversion in Formatter().parse(template.message_template)
+            if field
+        }
+        self._format = template.message_template.format
+        self.context = {'school_name': SCHOOL_NAME, **context}
+    
+    def render(self, student, **context):
+        values = dict(self.context, **context)
+        # Only resolve the student's name when the template actually uses it
+        if 'student_name' in self.fields:
+            values['student_name'] = student.user.get_full_name()
+        return self._format(**values)
+    
+    def build(self, student, **context):
+        """An unsaved pending notification to the student's parent"""
+        return Notification(
+            student=student,
+            template=self.template,
+            recipient_phone=student.parent_phone,
+            message_content=self.render(student, **context),
+            status='pending'
+        )
+    
+    def render_queryset(self, queryset, student_path='student', context=None, chunk_size=2000):
+        """Yield one pending notification per row, joining each row's student and user"""
+        if student_path:
+            queryset = queryset.select_related(f'{student_path}__user')
+        else:
+            queryset = queryset.select_related('user')
+        
+        for row in queryset.iterator(chunk_size=chunk_size):
+            student = getattr(row, student_path) if student_path else row
+            yield self.build(student, **(context(row) if context else {}))
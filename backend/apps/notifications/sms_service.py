@@ -0,0 +1,81 @@
+import threading
+import time
+from django.conf import settings
+
+class TwilioProvider:
+    """Send through Twilio over one pooled, thread-safe HTTP session"""
+    
+    def __init__(self, max_connections=None):
+        from requests.adapters import HTTPAdapter
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+        
+        max_connections = max_connections or getattr(settings, 'SMS_DISPATCH_WORKERS', 16)
+        http_client = TwilioHttpClient(pool_connections=True)
+        # Keep one keep-alive connection per dispatch worker instead of reconnecting per message
+        http_client.session.mount('https://', HTTPAdapter(pool_maxsize=max_connections))
+        
+        self.client = Client(
+            settings.TWILIO_ACCOUNT_SID,
+            settings.TWILIO_AUTH_TOKEN,
+            http_client=http_client
+        )
+        self.from_number = settings.TWILIO_PHONE_NUMBER
+    
+    def send(self, to_number, message):
+        message_instance = self.client.messages.create(
+            body=message,
+            from_=self.from_number,
+            to=to_number
+        )
+        return message_instance.sid, message_instance.status
+
+class FakeSMSProvider:
+    """In-process provider for tests and local runs; records instead of sending"""
+    
+    def __init__(self, latency=0, failing_numbers=()):
+        self.latency = latency
+        self.failing_numbers = set(failing_numbers)
+        self.sent = []
+        self._lock = threading.Lock()
+    
+    def send(self, to_number, message):
+        if self.latency:
+            time.sleep(self.latency)
+        if to_number in self.failing_numbers:
+            raise ValueError(f"Unreachable number {to_number}")
+        
+        with self._lock:
+            self.sent.append((to_number, message))
+            return f'FAKE{len(self.sent):08d}', 'queued'
+
+PROVIDERS = {
+    'twilio': TwilioProvider,
+    'fake': FakeSMSProvider,
+}
+
+def get_provider():
+    """Build the provider named by settings.SMS_PROVIDER"""
+    return PROVIDERS[getattr(settings, 'SMS_PROVIDER', 'twilio')]()
+
+# SMS Service
+class SMSService:
+    def __init__(self, provider=None):
+        self.provider = provider or get_provider()
+    
+    def send_sms(self, to_number, message):
+        """Send an SMS through the configured provider"""
+        try:
+            sid, status = self.provider.send(to_number, message)
+            
+            return {
+                'success': True,
+                'message_sid': sid,
+                'status': status
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
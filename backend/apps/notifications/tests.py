@@ -1,3 +1,316 @@
+import time
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from apps.students.models import Student, Class
+from .models import Notification, NotificationTemplate
+from .dispatch import SMSDispatcher, TokenBucket
+from .sms_service import FakeSMSProvider, SMSService
 
-# Create your tests here.
+User = get_user_model()
+
+def make_student(roll_number, parent_phone, student_class=None, **kwargs):
+    """Create a student with a parent phone for notification tests"""
+    if student_class is None:
+        student_class, created = Class.objects.get_or_create(
+            name='Notify Class',
+            grade=10,
+            section='A',
+            academic_year='2024-25'
+        )
+    return Student.objects.create(
+        user=User.objects.create_user(username=roll_number.lower(), user_type='student'),
+        roll_number=roll_number,
+        student_class=student_class,
+        admission_date='2024-01-01',
+        parent_name='Test Parent',
+        parent_phone=parent_phone,
+        address='Test Address',
+        **kwargs
+    )
+
+class SMSDispatcherTestCase(TestCase):
+    def setUp(self):
+        self.template = NotificationTemplate.objects.create(
+            name='Risk',
+            template_type='risk_alert',
+            message_template='{student_name} is at {risk_level} risk'
+        )
+    
+    def test_dispatch_sends_concurrently_and_writes_back_statuses(self):
+        notifications = [
+            Notification.objects.create(
+                student=make_student(f'NT{i:03d}', f'+1555000{i:04d}'),
+                template=self.template,
+                recipient_phone=f'+1555000{i:04d}',
+                message_content=f'Message {i}'
+            )
+            for i in range(6)
+        ]
+        provider = FakeSMSProvider(latency=0.05, failing_numbers={'+15550000005'})
+        dispatcher = SMSDispatcher(SMSService(provider), max_workers=6, rate=1000)
+        
+        started = time.monotonic()
+        counts = dispatcher.dispatch(notifications)
+        
+        # Six 50ms sends on six workers overlap instead of taking 300ms
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertEqual(counts, {'sent': 5, 'failed': 1})
+        self.assertEqual(len(provider.sent), 5)
+        self.assertEqual(Notification.objects.filter(status='sent', sent_at__isnull=False).count(), 5)
+        self.assertEqual(Notification.objects.get(recipient_phone='+15550000005').status, 'failed')
+    
+    def test_token_bucket_limits_rate_after_burst(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        
+        started = time.monotonic()
+        for _ in range(10):
+            bucket.acquire()
+        
+        # Five tokens come from the burst, the other five at 50 per second
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+class NotificationQueueTestCase(TestCase):
+    def setUp(self):
+        template = NotificationTemplate.objects.create(
+            name='Attendance',
+            template_type='attendance_warning',
+            message_template='{student_name} attendance {attendance_percentage}'
+        )
+        for i in range(5):
+            Notification.objects.create(
+                student=make_student(f'NQ{i:03d}', f'+1555100{i:04d}'),
+                template=template,
+                recipient_phone=f'+1555100{i:04d}',
+                message_content=f'Message {i}'
+            )
+    
+    def test_workers_claim_disjoint_batches(self):
+        from .queue import NotificationQueue
+        
+        first = NotificationQueue(worker_id='worker-1', batch_size=3, coalesce_window=0).claim()
+        second = NotificationQueue(worker_id='worker-2', batch_size=3, coalesce_window=0).claim()
+        third = NotificationQueue(worker_id='worker-3', batch_size=3, coalesce_window=0).claim()
+        
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertEqual(third, [])
+        self.assertFalse({n.id for n in first} & {n.id for n in second})
+    
+    def test_failed_sends_retry_with_backoff(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .queue import NotificationQueue
+        
+        queue = NotificationQueue(
+            worker_id='worker-1', retry_backoff=60, max_attempts=2, coalesce_window=0
+        )
+        provider = FakeSMSProvider(failing_numbers={'+15551000000'})
+        dispatcher = SMSDispatcher(SMSService(provider), rate=1000)
+        
+        counts = dispatcher.dispatch(queue.claim(), queue)
+        self.assertEqual(counts, {'sent': 4, 'failed': 1})
+        
+        failed = Notification.objects.get(status='failed')
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(failed.claimed_by, '')
+        self.assertGreater(failed.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        
+        # Not due yet, then due once the backoff has passed
+        self.assertEqual(queue.claim(), [])
+        Notification.objects.filter(id=failed.id).update(next_attempt_at=timezone.now())
+        dispatcher.dispatch(queue.claim(), queue)
+        
+        # The second failure exhausts max_attempts and is not retried again
+        failed.refresh_from_db()
+        self.assertEqual(failed.attempts, 2)
+        self.assertIsNone(failed.next_attempt_at)
+        self.assertEqual(queue.claim(), [])
+
+class RiskAlertPlannerTestCase(TestCase):
+    def setUp(self):
+        self.template = NotificationTemplate.objects.create(
+            name='Risk',
+            template_type='risk_alert',
+            message_template='{student_name} is at {risk_level} risk - {school_name}'
+        )
+        self.students = [
+            make_student(f'RA{i:03d}', f'+1555200{i:04d}', current_risk_level='high')
+            for i in range(4)
+        ]
+        make_student('RA999', '+15552009999', current_risk_level='low')
+        
+        Notification.objects.create(
+            student=self.students[0],
+            template=self.template,
+            recipient_phone=self.students[0].parent_phone,
+            message_content='Already alerted today',
+            status='sent'
+        )
+    
+    def test_enqueues_one_alert_per_unalerted_high_risk_student(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .alerts import RiskAlertPlanner
+        
+        with CaptureQueriesContext(connection) as queries:
+            queued = RiskAlertPlanner().enqueue()
+        
+        # Template, anti-join and insert, independent of the number of students
+        self.assertLessEqual(len(queries), 4)
+        self.assertEqual(queued, 3)
+        
+        pending = Notification.objects.filter(status='pending')
+        self.assertEqual(
+            set(pending.values_list('student_id', flat=True)),
+            {student.id for student in self.students[1:]}
+        )
+        self.assertIn('HIGH', pending.first().message_content)
+        
+        # A second run the same day queues nothing
+        self.assertEqual(RiskAlertPlanner().enqueue(), 0)
+    
+    def test_queued_alerts_are_sent_once_the_window_has_passed(self):
+        from datetime import timedelta
+        from django.test import override_settings
+        from django.utils import timezone
+        from .alerts import RiskAlertPlanner
+        from .tasks import process_pending_notifications
+        
+        with override_settings(SMS_PROVIDER='fake', NOTIFICATION_COALESCE_WINDOW=300):
+            RiskAlertPlanner().enqueue()
+            
+            # Inside the coalescing window nothing goes out
+            process_pending_notifications()
+            self.assertEqual(Notification.objects.filter(status='pending').count(), 3)
+            
+            Notification.objects.filter(status='pending').update(
+                created_at=timezone.now() - timedelta(seconds=301)
+            )
+            process_pending_notifications()
+        
+        self.assertFalse(Notification.objects.filter(status='pending').exists())
+        self.assertEqual(
+            set(Notification.objects.filter(status='sent', sent_at__isnull=False).values_list(
+                'student_id', flat=True
+            )),
+            {student.id for student in self.students[1:]}
+        )
+
+class TemplateRenderingTestCase(TestCase):
+    def setUp(self):
+        self.template = NotificationTemplate.objects.create(
+            name='Attendance',
+            template_type='attendance_warning',
+            message_template='{student_name} attendance is {attendance_percentage:.0f}% at {school_name}'
+        )
+    
+    def test_template_cache_hits_until_template_is_saved(self):
+        from .rendering import template_cache
+        
+        with self.assertNumQueries(1):
+            template_cache.get('attendance_warning')
+            template_cache.get('attendance_warning')
+        
+        self.template.message_template = 'Updated {student_name}'
+        self.template.save()
+        
+        self.assertEqual(template_cache.get('attendance_warning').message_template, 'Updated {student_name}')
+    
+    def test_renders_a_whole_queryset_in_one_pass(self):
+        from apps.analytics.models import StudentAnalytics
+        from .rendering import MessageRenderer, template_cache
+        
+        for i in range(5):
+            StudentAnalytics.objects.create(
+                student=make_student(f'TR{i:03d}', f'+1555300{i:04d}'),
+                overall_attendance_percentage=60 + i
+            )
+        
+        # One template query and one joined scan, however many students there are
+        with self.assertNumQueries(2):
+            renderer = MessageRenderer(template_cache.get('attendance_warning'))
+            notifications = list(renderer.render_queryset(
+                StudentAnalytics.objects.order_by('overall_attendance_percentage'),
+                context=lambda analytics: {
+                    'attendance_percentage': analytics.overall_attendance_percentage
+                }
+            ))
+        
+        self.assertEqual(len(notifications), 5)
+        self.assertEqual(notifications[0].recipient_phone, '+15553000000')
+        self.assertTrue(notifications[0].message_content.endswith('attendance is 60% at Your School Name'))
+
+class NotificationCoalescerTestCase(TestCase):
+    def setUp(self):
+        self.risk = NotificationTemplate.objects.create(
+            name='Risk', template_type='risk_alert', message_template='{student_name} risk'
+        )
+        self.attendance = NotificationTemplate.objects.create(
+            name='Attendance', template_type='attendance_warning', message_template='{student_name} attendance'
+        )
+        self.student = make_student('NC001', '+15554000001')
+        self.other = make_student('NC002', '+15554000002')
+    
+    def notify(self, student, template, message, **kwargs):
+        return Notification.objects.create(
+            student=student,
+            template=template,
+            recipient_phone=student.parent_phone,
+            message_content=message,
+            **kwargs
+        )
+    
+    def test_pending_messages_to_one_phone_become_one_digest(self):
+        from .coalesce import NotificationCoalescer
+        from .queue import NotificationQueue
+        
+        risk = self.notify(self.student, self.risk, 'High risk')
+        attendance = self.notify(self.student, self.attendance, 'Low attendance')
+        self.notify(self.other, self.risk, 'Other risk')
+        
+        totals = NotificationCoalescer(window=0, quiet_period=0).run()
+        self.assertEqual(totals, {'digests': 1, 'merged': 2, 'held': 0})
+        
+        digest = Notification.objects.get(is_digest=True)
+        self.assertIn('- High risk\n- Low attendance', digest.message_content)
+        self.assertEqual(
+            set(digest.merged_notifications.values_list('id', flat=True)),
+            {risk.id, attendance.id}
+        )
+        
+        claimed = NotificationQueue(worker_id='worker-1', coalesce_window=0).claim()
+        self.assertEqual(sorted(n.recipient_phone for n in claimed), ['+15554000001', '+15554000002'])
+    
+    def test_quiet_period_holds_and_later_messages_join_the_digest(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .coalesce import NotificationCoalescer
+        from .queue import NotificationQueue
+        
+        sent_at = timezone.now() - timedelta(minutes=10)
+        self.notify(self.student, self.risk, 'Yesterday', status='sent', sent_at=sent_at)
+        held = self.notify(self.student, self.attendance, 'Low attendance')
+        
+        coalescer = NotificationCoalescer(window=0, quiet_period=3600)
+        self.assertEqual(coalescer.run()['held'], 1)
+        held.refresh_from_db()
+        self.assertEqual(held.next_attempt_at, sent_at + timedelta(hours=1))
+        self.assertEqual(NotificationQueue(worker_id='worker-1', coalesce_window=0).claim(), [])
+        
+        self.notify(self.student, self.risk, 'High risk')
+        coalescer.run()
+        
+        digest = Notification.objects.get(status='pending')
+        self.assertTrue(digest.is_digest)
+        self.assertEqual(digest.next_attempt_at, sent_at + timedelta(hours=1))
+        self.assertIn('- Low attendance\n- High risk', digest.message_content)
+    
+    def test_attendance_warnings_are_not_repeated_within_the_interval(self):
+        from apps.analytics.models import StudentAnalytics
+        from .alerts import AttendanceAlertPlanner
+        
+        StudentAnalytics.objects.create(student=self.student, overall_attendance_percentage=60)
+        StudentAnalytics.objects.create(student=self.other, overall_attendance_percentage=90)
+        
+        self.assertEqual(AttendanceAlertPlanner().enqueue(), 1)
+        self.assertEqual(AttendanceAlertPlanner().enqueue(), 0)
@@ -0,0 +1,260 @@
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from .models import Student, Subject, Attendance, Assessment, FeeRecord
+from .rollups import existing_attendance_statuses, apply_attendance_changes
+
+REQUIRED_COLUMNS = {
+    'attendance': ['roll_number', 'subject_code', 'date', 'status'],
+    'marks': [
+        'roll_number', 'subject_code', 'assessment_type', 'title',
+        'max_marks', 'obtained_marks', 'date'
+    ],
+    'fees': [
+        'roll_number', 'academic_year', 'semester', 'total_amount', 'due_date'
+    ],
+}
+
+ATTENDANCE_STATUSES = {'present', 'absent', 'late'}
+ASSESSMENT_TYPES = {choice for choice, _ in Assessment.ASSESSMENT_TYPES}
+FEE_STATUSES = {'pending', 'paid', 'overdue'}
+
+# Cap on per-row error messages kept in the summary
+MAX_REPORTED_ERRORS = 100
+
+class UploadError(Exception):
+    """Raised when an upload cannot be ingested at all"""
+
+class UploadIngestor:
+    """Stream an attendance, marks or fees upload into the database chunk by chunk"""
+    
+    def __init__(self, data_type, chunk_size=None, on_progress=None):
+        if data_type not in REQUIRED_COLUMNS:
+            raise UploadError('Invalid data type')
+        
+        self.data_type = data_type
+        self.chunk_size = chunk_size or getattr(settings, 'UPLOAD_CHUNK_SIZE', 5000)
+        self.on_progress = on_progress
+        self.rows_processed = 0
+        self.rows_written = 0
+        self.error_count = 0
+        self.errors = []
+        
+        # Resolved once per upload instead of once per row
+        self.student_ids = dict(Student.objects.values_list('roll_number', 'id'))
+        self.subject_ids = (
+            dict(Subject.objects.values_list('code', 'id'))
+            if data_type in ('attendance', 'marks') else {}
+        )
+    
+    def ingest(self, file, file_name=None):
+        """Ingest an uploaded file and return a summary of the run"""
+        for chunk in read_chunks(file, file_name or file.name, self.chunk_size):
+            self.process_chunk(chunk)
+        
+        return self.summary()
+    
+    def summary(self):
+        return {
+            'data_type': self.data_type,
+            'rows_processed': self.rows_processed,
+            'rows_written': self.rows_written,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+    
+    def process_chunk(self, df):
+        """Validate, resolve and bulk insert one chunk of rows"""
+        missing = [column for column in REQUIRED_COLUMNS[self.data_type] if column not in df.columns]
+        if missing:
+            raise UploadError(f"Missing columns: {', '.join(missing)}")
+        
+        # Spreadsheet row numbers (header is row 1)
+        chunk_rows = len(df)
+        df = df.copy()
+        df['_row'] = range(self.rows_processed + 2, self.rows_processed + 2 + chunk_rows)
+        df['student_id'] = df['roll_number'].astype(str).str.strip().map(self.student_ids)
+        df = self._reject(df, df['student_id'].isna(), 'Unknown roll number')
+        
+        if self.data_type == 'attendance':
+            objects = self._build_attendance(df)
+            with transaction.atomic():
+                previous = existing_attendance_statuses(objects)
+                Attendance.objects.bulk_create(
+                    objects,
+                    batch_size=self.chunk_size,
+                    update_conflicts=True,
+                    unique_fields=['student', 'subject', 'date'],
+                    update_fields=['status', 'updated_at']
+                )
+                apply_attendance_changes([
+                    (record.student_id, record.subject_id, record.date,
+                     previous.get((record.student_id, record.subject_id, record.date)), record.status)
+                    for record in objects
+                ])
+        elif self.data_type == 'marks':
+            objects = self._build_assessments(df)
+            with transaction.atomic():
+                Assessment.objects.bulk_create(
+                    objects,
+                    batch_size=self.chunk_size,
+                    update_conflicts=True,
+                    unique_fields=['student', 'subject', 'assessment_type', 'title', 'date_conducted'],
+                    update_fields=['max_marks', 'obtained_marks', 'updated_at']
+                )
+        else:
+            objects = self._build_fee_records(df)
+            with transaction.atomic():
+                FeeRecord.objects.bulk_create(
+                    objects,
+                    batch_size=self.chunk_size,
+                    update_conflicts=True,
+                    unique_fields=['student', 'academic_year', 'semester'],
+                    update_fields=['total_amount', 'paid_amount', 'due_date', 'payment_date', 'status']
+                )
+        
+        self.rows_processed += chunk_rows
+        self.rows_written += len(objects)
+        
+        if self.on_progress:
+            self.on_progress(self.summary())
+    
+    def _reject(self, df, mask, message):
+        """Record errors for the rows selected by mask and drop them"""
+        rejected = df.loc[mask, '_row']
+        self.error_count += len(rejected)
+        
+        for row in rejected:
+            if len(self.errors) >= MAX_REPORTED_ERRORS:
+                break
+            self.errors.append({'row': int(row), 'error': message})
+        
+        return df.loc[~mask]
+    
+    def _resolve_subjects(self, df):
+        df['subject_id'] = df['subject_code'].astype(str).str.strip().map(self.subject_ids)
+        return self._reject(df, df['subject_id'].isna(), 'Unknown subject code')
+    
+    def _parse_dates(self, df, column, required=True):
+        df[column] = pd.to_datetime(df[column], errors='coerce').dt.date
+        if not required:
+            return df
+        return self._reject(df, df[column].isna(), f'Invalid {column}')
+    
+    def _parse_numbers(self, df, column):
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+        return self._reject(df, df[column].isna(), f'Invalid {column}')
+    
+    def _build_attendance(self, df):
+        df = self._resolve_subjects(df)
+        df = self._parse_dates(df, 'date')
+        df['status'] = df['status'].astype(str).str.strip().str.lower()
+        df = self._reject(df, ~df['status'].isin(ATTENDANCE_STATUSES), 'Invalid status')
+        
+        # A repeated (student, subject, date) keeps its last row, as an upsert would
+        records = {}
+        for student_id, subject_id, date, status in zip(
+            df['student_id'], df['subject_id'], df['date'], df['status']
+        ):
+            student_id, subject_id = int(student_id), int(subject_id)
+            records[(student_id, subject_id, date)] = Attendance(
+                student_id=student_id, subject_id=subject_id, date=date, status=status
+            )
+        
+        return list(records.values())
+    
+    def _build_assessments(self, df):
+        df = self._resolve_subjects(df)
+        df = self._parse_dates(df, 'date')
+        df = self._parse_numbers(df, 'max_marks')
+        df = self._parse_numbers(df, 'obtained_marks')
+        df['assessment_type'] = df['assessment_type'].astype(str).str.strip().str.lower()
+        df = self._reject(df, ~df['assessment_type'].isin(ASSESSMENT_TYPES), 'Invalid assessment type')
+        
+        # A repeated (student, subject, type, title, date) keeps its last row
+        records = {}
+        for student_id, subject_id, assessment_type, title, max_marks, obtained_marks, date in zip(
+            df['student_id'], df['subject_id'], df['assessment_type'], df['title'],
+            df['max_marks'], df['obtained_marks'], df['date']
+        ):
+            student_id, subject_id, title = int(student_id), int(subject_id), str(title)[:200]
+            records[(student_id, subject_id, assessment_type, title, date)] = Assessment(
+                student_id=student_id,
+                subject_id=subject_id,
+                assessment_type=assessment_type,
+                title=title,
+                max_marks=int(max_marks),
+                obtained_marks=int(obtained_marks),
+                date_conducted=date
+            )
+        
+        return list(records.values())
+    
+    def _build_fee_records(self, df):
+        df = self._parse_dates(df, 'due_date')
+        df = self._parse_numbers(df, 'total_amount')
+        
+        if 'paid_amount' not in df.columns:
+            df['paid_amount'] = 0
+        df['paid_amount'] = pd.to_numeric(df['paid_amount'], errors='coerce').fillna(0)
+        
+        if 'payment_date' not in df.columns:
+            df['payment_date'] = None
+        df = self._parse_dates(df, 'payment_date', required=False)
+        
+        if 'status' not in df.columns:
+            df['status'] = 'pending'
+        df['status'] = df['status'].fillna('pending').astype(str).str.strip().str.lower()
+        df = self._reject(df, ~df['status'].isin(FEE_STATUSES), 'Invalid status')
+        
+        # A repeated (student, academic year, semester) keeps its last row
+        records = {}
+        for student_id, academic_year, semester, total_amount, paid_amount, due_date, payment_date, status in zip(
+            df['student_id'], df['academic_year'], df['semester'], df['total_amount'],
+            df['paid_amount'], df['due_date'], df['payment_date'], df['status']
+        ):
+            student_id, academic_year, semester = int(student_id), str(academic_year), str(semester)
+            records[(student_id, academic_year, semester)] = FeeRecord(
+                student_id=student_id,
+                academic_year=academic_year,
+                semester=semester,
+                total_amount=round(float(total_amount), 2),
+                paid_amount=round(float(paid_amount), 2),
+                due_date=due_date,
+                payment_date=None if pd.isna(payment_date) else payment_date,
+                status=status
+            )
+        
+        return list(records.values())
+
+def read_chunks(file, file_name, chunk_size):
+    """Yield DataFrames of at most chunk_size rows from a CSV or XLSX upload"""
+    if file_name.endswith('.csv'):
+        yield from pd.read_csv(file, chunksize=chunk_size, dtype={'roll_number': str})
+    elif file_name.endswith('.xlsx'):
+        yield from _read_excel_chunks(file, chunk_size)
+    else:
+        raise UploadError('Unsupported file format')
+
+def _read_excel_chunks(file, chunk_size):
+    """Stream worksheet rows with openpyxl's read-only mode"""
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(column).strip() if column is not None else '' for column in header]
+        
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.students.models import Subject
+from apps.students.synthetic import SyntheticInstitution
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic institution for load and scale testing'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=10000)
+        parser.add_argument('--subjects', type=int, default=6)
+        parser.add_argument('--days', type=int, default=180, help='School days of attendance')
+        parser.add_argument('--students-per-class', type=int, default=40)
+        parser.add_argument(
+            '--labelled-fraction',
+            type=float,
+            default=0.3,
+            help='Share of students with a known outcome (graduated or dropped out)'
+        )
+        parser.add_argument(
+            '--dropout-rate',
+            type=float,
+            default=0.3,
+            help='Share of labelled students who dropped out'
+        )
+        parser.add_argument(
+            '--correlation',
+            type=float,
+            default=0.8,
+            help='0 makes outcomes independent of attendance, marks and fees; 1 fully driven by them'
+        )
+        parser.add_argument('--semesters', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='SYN', help='Prefix for roll numbers, usernames and codes')
+        parser.add_argument('--batch-size', type=int, default=5000)
+    
+    def handle(self, *args, **options):
+        if Subject.objects.filter(code__startswith=options['prefix']).exists():
+            raise CommandError(f"Data with prefix {options['prefix']} already exists; pick another --prefix")
+        for option in ['labelled_fraction', 'dropout_rate', 'correlation']:
+            if not 0 <= options[option] <= 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be between 0 and 1")
+        
+        reported = {}
+        
+        def on_progress(model_name, rows):
+            # Report roughly every million rows per table
+            if rows // 1000000 > reported.get(model_name, 0):
+                reported[model_name] = rows // 1000000
+                self.stdout.write(f"{model_name}: {rows} rows")
+        
+        institution = SyntheticInstitution(
+            students=options['students'],
+            subjects=options['subjects'],
+            days=options['days'],
+            students_per_class=options['students_per_class'],
+            labelled_fraction=options['labelled_fraction'],
+            dropout_rate=options['dropout_rate'],
+            correlation=options['correlation'],
+            semesters=options['semesters'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            on_progress=on_progress
+        )
+        counts = institution.generate()
+        
+        for model_name, rows in counts.items():
+            self.stdout.write(f"{model_name}: {rows}")
+        self.stdout.write(self.style.SUCCESS(
+            'Generated institution; run update_student_analytics(full=True) before retrain_ml_model'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from apps.students.models import DailyAttendanceRollup, StudentAttendanceRollup
+from apps.students.rollups import rebuild_attendance_rollups
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily and per-student attendance rollups from raw attendance'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+    
+    def handle(self, *args, **options):
+        rebuild_attendance_rollups(batch_size=options['batch_size'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {DailyAttendanceRollup.objects.count()} daily and "
+            f"{StudentAttendanceRollup.objects.count()} student attendance rollups"
+        ))
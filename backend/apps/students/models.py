@@ -1,9 +1,12 @@
 from django.db import models
 
 # Create your models here.
+import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
 
 User = get_user_model()
 
@@ -38,6 +41,19 @@ class Student(models.Model):
     risk_score = models.FloatField(default=0.0)
     last_risk_update = models.DateTimeField(auto_now=True)
     
+    # Outcome used as the label when retraining the dropout model
+    enrollment_status = models.CharField(
+        max_length=20,
+        choices=[('active', 'Active'), ('graduated', 'Graduated'), ('dropped_out', 'Dropped Out')],
+        default='active'
+    )
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['current_risk_level', 'roll_number']),
+            models.Index(fields=['-risk_score', 'id']),
+        ]
+    
     def __str__(self):
         return f"{self.roll_number} - {self.user.get_full_name()}"
 
@@ -58,6 +74,8 @@ class Attendance(models.Model):
         choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late')]
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped by status corrections so incremental analytics can recompute the student
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     class Meta:
         unique_together = ['student', 'subject', 'date']
@@ -65,6 +83,38 @@ class Attendance(models.Model):
     def __str__(self):
         return f"{self.student.roll_number} - {self.subject.code} - {self.date}"
 
+class DailyAttendanceRollup(models.Model):
+    """Attendance counts per day, class and subject"""
+    date = models.DateField()
+    student_class = models.ForeignKey(Class, on_delete=models.CASCADE)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['date', 'student_class', 'subject']
+    
+    def __str__(self):
+        return f"{self.date} - {self.student_class_id} - {self.subject_id}"
+
+class StudentAttendanceRollup(models.Model):
+    """Cumulative attendance counts per student"""
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='attendance_rollup')
+    total_classes = models.IntegerField(default=0)
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"Attendance rollup for {self.student_id}"
+    
+    @property
+    def attendance_percentage(self):
+        if self.total_classes == 0:
+            return 0
+        return ((self.present + self.late) / self.total_classes) * 100
+
 class Assessment(models.Model):
     ASSESSMENT_TYPES = [
         ('quiz', 'Quiz'),
@@ -82,6 +132,10 @@ class Assessment(models.Model):
     obtained_marks = models.IntegerField()
     date_conducted = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        unique_together = ['student', 'subject', 'assessment_type', 'title', 'date_conducted']
     
     def __str__(self):
         return f"{self.student.roll_number} - {self.title}"
@@ -104,9 +158,73 @@ class FeeRecord(models.Model):
         default='pending'
     )
     
+    class Meta:
+        unique_together = ['student', 'academic_year', 'semester']
+    
     def __str__(self):
         return f"{self.student.roll_number} - {self.academic_year} - {self.status}"
     
     @property
     def due_amount(self):
-        return self.total_amount - self.paid_amount
\ No newline at end of file
+        return self.total_amount - self.paid_amount
+
+class UploadJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    data_type = models.CharField(max_length=20)
+    file = models.FileField(upload_to='uploads/')
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    rows_processed = models.IntegerField(default=0)
+    rows_written = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.data_type} upload {self.job_id} - {self.status}"
+    
+    @property
+    def group_name(self):
+        return f"upload_{self.job_id}"
+
+# Keep attendance rollups in step with single-row writes; bulk ingest
+# applies its changes through apps.students.rollups directly
+@receiver(pre_save, sender=Attendance)
+def attendance_pre_save(sender, instance, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = Attendance.objects.filter(pk=instance.pk).values_list(
+            'student_id', 'subject_id', 'date', 'status'
+        ).first()
+
+@receiver(post_save, sender=Attendance)
+def attendance_post_save(sender, instance, **kwargs):
+    from .rollups import apply_attendance_changes
+    
+    date = Attendance._meta.get_field('date').to_python(instance.date)
+    current = (instance.student_id, instance.subject_id, date)
+    previous = getattr(instance, '_rollup_previous', None)
+    
+    if previous and previous[:3] == current:
+        changes = [current + (previous[3], instance.status)]
+    else:
+        changes = [current + (None, instance.status)]
+        if previous:
+            changes.append(previous[:3] + (previous[3], None))
+    
+    apply_attendance_changes(changes)
+
+@receiver(post_delete, sender=Attendance)
+def attendance_post_delete(sender, instance, **kwargs):
+    from .rollups import apply_attendance_changes
+    
+    date = Attendance._meta.get_field('date').to_python(instance.date)
+    apply_attendance_changes([(instance.student_id, instance.subject_id, date, instance.status, None)])
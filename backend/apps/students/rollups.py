@@ -0,0 +1,159 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import Student, Attendance, DailyAttendanceRollup, StudentAttendanceRollup
+
+STATUS_FIELDS = {'present': 'present', 'absent': 'absent', 'late': 'late'}
+
+def existing_attendance_statuses(records):
+    """Map (student_id, subject_id, date) -> current status for records already stored"""
+    if not records:
+        return {}
+    
+    keys = {(record.student_id, record.subject_id, record.date) for record in records}
+    rows = Attendance.objects.filter(
+        student_id__in={key[0] for key in keys},
+        subject_id__in={key[1] for key in keys},
+        date__in={key[2] for key in keys}
+    ).values_list('student_id', 'subject_id', 'date', 'status')
+    
+    return {
+        (student_id, subject_id, date): status
+        for student_id, subject_id, date, status in rows
+        if (student_id, subject_id, date) in keys
+    }
+
+def apply_attendance_changes(changes):
+    """Fold attendance changes into the daily and per-student rollups.
+    
+    Each change is (student_id, subject_id, date, old_status, new_status),
+    with old_status None for a new row and new_status None for a deleted one.
+    """
+    daily_deltas = defaultdict(lambda: defaultdict(int))
+    student_deltas = defaultdict(lambda: defaultdict(int))
+    
+    student_ids = {change[0] for change in changes}
+    class_ids = dict(
+        Student.objects.filter(id__in=student_ids).values_list('id', 'student_class_id')
+    )
+    
+    for student_id, subject_id, date, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        
+        daily_key = (date, class_ids[student_id], subject_id)
+        if old_status:
+            daily_deltas[daily_key][STATUS_FIELDS[old_status]] -= 1
+            student_deltas[student_id][STATUS_FIELDS[old_status]] -= 1
+            student_deltas[student_id]['total_classes'] -= 1
+        if new_status:
+            daily_deltas[daily_key][STATUS_FIELDS[new_status]] += 1
+            student_deltas[student_id][STATUS_FIELDS[new_status]] += 1
+            student_deltas[student_id]['total_classes'] += 1
+    
+    with transaction.atomic():
+        _apply_daily_deltas(daily_deltas)
+        _apply_student_deltas(student_deltas)
+
+def _apply_daily_deltas(deltas):
+    if not deltas:
+        return
+    
+    # Insert any missing rows first and skip those that exist or that a
+    # concurrent writer just inserted, so every delta lands on a locked row
+    DailyAttendanceRollup.objects.bulk_create(
+        [
+            DailyAttendanceRollup(date=date, student_class_id=class_id, subject_id=subject_id)
+            for date, class_id, subject_id in deltas
+        ],
+        ignore_conflicts=True
+    )
+    
+    rollups = []
+    for rollup in DailyAttendanceRollup.objects.select_for_update().filter(
+        date__in={key[0] for key in deltas},
+        student_class_id__in={key[1] for key in deltas},
+        subject_id__in={key[2] for key in deltas}
+    ):
+        delta = deltas.get((rollup.date, rollup.student_class_id, rollup.subject_id))
+        if delta is None:
+            continue
+        
+        for field, value in delta.items():
+            setattr(rollup, field, getattr(rollup, field) + value)
+        rollups.append(rollup)
+    
+    DailyAttendanceRollup.objects.bulk_update(rollups, ['present', 'absent', 'late'])
+
+def _apply_student_deltas(deltas):
+    if not deltas:
+        return
+    
+    StudentAttendanceRollup.objects.bulk_create(
+        [StudentAttendanceRollup(student_id=student_id) for student_id in deltas],
+        ignore_conflicts=True
+    )
+    
+    rollups = list(
+        StudentAttendanceRollup.objects.select_for_update().filter(student_id__in=deltas.keys())
+    )
+    for rollup in rollups:
+        for field, value in deltas[rollup.student_id].items():
+            setattr(rollup, field, getattr(rollup, field) + value)
+    
+    StudentAttendanceRollup.objects.bulk_update(
+        rollups, ['total_classes', 'present', 'absent', 'late']
+    )
+
+def rebuild_attendance_rollups(batch_size=5000):
+    """Recompute both rollup tables from the raw Attendance table"""
+    status_counts = {
+        'present': Count('id', filter=Q(status='present')),
+        'absent': Count('id', filter=Q(status='absent')),
+        'late': Count('id', filter=Q(status='late')),
+    }
+    
+    with transaction.atomic():
+        DailyAttendanceRollup.objects.all().delete()
+        StudentAttendanceRollup.objects.all().delete()
+        
+        daily_rows = Attendance.objects.values(
+            'date', 'student__student_class_id', 'subject_id'
+        ).annotate(**status_counts).order_by()
+        _bulk_insert(
+            (
+                DailyAttendanceRollup(
+                    date=row['date'],
+                    student_class_id=row['student__student_class_id'],
+                    subject_id=row['subject_id'],
+                    present=row['present'],
+                    absent=row['absent'],
+                    late=row['late']
+                )
+                for row in daily_rows.iterator(chunk_size=batch_size)
+            ),
+            DailyAttendanceRollup,
+            batch_size
+        )
+        
+        student_rows = Attendance.objects.values('student_id').annotate(
+            total_classes=Count('id'), **status_counts
+        ).order_by()
+        _bulk_insert(
+            (
+                StudentAttendanceRollup(**row)
+                for row in student_rows.iterator(chunk_size=batch_size)
+            ),
+            StudentAttendanceRollup,
+            batch_size
+        )
+
+def _bulk_insert(objects, model, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
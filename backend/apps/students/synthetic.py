@@ -0,0 +1,275 @@
+from datetime import date, timedelta
+from decimal import Decimal
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.accounts.models import Profile
+from .models import Class, Student, Subject, Attendance, Assessment, FeeRecord
+from .rollups import rebuild_attendance_rollups
+
+User = get_user_model()
+
+FEE_AMOUNT = Decimal('5000.00')
+
+class SyntheticInstitution:
+    """Generate a reproducible institution whose outcomes correlate with its records"""
+    
+    def __init__(self, students=100, subjects=5, days=20, students_per_class=40,
+                 labelled_fraction=0.5, dropout_rate=0.3, correlation=0.8, semesters=2,
+                 seed=0, prefix='SYN', start_date=None, batch_size=5000, on_progress=None):
+        self.n_students = students
+        self.n_subjects = subjects
+        self.days = days
+        self.students_per_class = students_per_class
+        self.labelled_fraction = labelled_fraction
+        self.dropout_rate = dropout_rate
+        self.correlation = correlation
+        self.semesters = semesters
+        self.prefix = prefix
+        self.start_date = start_date or date(2024, 1, 1)
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.rng = np.random.default_rng(seed)
+        self.counts = {}
+    
+    @property
+    def school_days(self):
+        """The first `days` weekdays from start_date"""
+        days = []
+        day = self.start_date
+        while len(days) < self.days:
+            if day.weekday() < 5:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+    
+    @property
+    def end_date(self):
+        """First date after the generated attendance"""
+        school_days = self.school_days
+        return school_days[-1] + timedelta(days=1) if school_days else self.start_date
+    
+    def generate(self):
+        """Create every table and return the number of rows written per model"""
+        self.draw_profiles()
+        
+        classes = self.create_classes()
+        subjects = self.create_subjects()
+        self.student_ids = self.create_students(classes)
+        subject_ids = np.array([subject.id for subject in subjects])
+        
+        self.create_attendance(subject_ids)
+        self.create_assessments(subjects)
+        self.create_fee_records()
+        
+        # Raw inserts bypass the Attendance signals that maintain the rollups
+        rebuild_attendance_rollups(self.batch_size)
+        return self.counts
+    
+    def draw_profiles(self):
+        """Draw each student's latent risk and the record distributions it drives"""
+        n = self.n_students
+        risk = self.rng.beta(2, 5, n)
+        
+        self.attendance_rate = np.clip(0.98 - 0.45 * risk + self.rng.normal(0, 0.03, n), 0.2, 1.0)
+        self.late_share = 0.05 + 0.2 * risk
+        self.marks_mean = np.clip(85 - 55 * risk, 5, 100)
+        self.fee_overdue_probability = 0.05 + 0.7 * risk
+        
+        # Known outcomes: the top dropout_rate of a risk/noise blend drop out,
+        # so correlation=0 makes outcomes independent of the records
+        self.status = np.full(n, 'active', dtype=object)
+        labelled = self.rng.random(n) < self.labelled_fraction
+        if labelled.any():
+            score = self.correlation * risk + (1 - self.correlation) * self.rng.random(n)
+            threshold = np.quantile(score[labelled], 1 - self.dropout_rate)
+            self.status[labelled] = 'graduated'
+            self.status[labelled & (score >= threshold)] = 'dropped_out'
+    
+    def _record(self, model, rows):
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + rows
+        if self.on_progress:
+            self.on_progress(model.__name__, self.counts[model.__name__])
+    
+    def _bulk_create(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self._record(model, len(created))
+        return created
+    
+    def _insert_rows(self, model, fields, rows):
+        """Insert tuples of field values, with COPY on PostgreSQL"""
+        if connection.vendor == 'postgresql':
+            self._copy_rows(model, fields, rows)
+            return
+        
+        batch = []
+        for row in rows:
+            batch.append(model(**dict(zip(fields, row))))
+            if len(batch) >= self.batch_size:
+                self._bulk_create(model, batch)
+                batch = []
+        if batch:
+            self._bulk_create(model, batch)
+    
+    def _copy_rows(self, model, fields, rows):
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+        sql = f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN'
+        
+        written = 0
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy'):
+                # psycopg 3
+                with raw.copy(sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                        written += 1
+            else:
+                # psycopg2; generated values never contain tabs, newlines or backslashes
+                from io import StringIO
+                buffer = StringIO()
+                for row in rows:
+                    buffer.write('\t'.join(r'\N' if value is None else str(value) for value in row))
+                    buffer.write('\n')
+                    written += 1
+                buffer.seek(0)
+                raw.copy_expert(sql, buffer)
+        self._record(model, written)
+    
+    def create_classes(self):
+        n_classes = max(1, -(-self.n_students // self.students_per_class))
+        return self._bulk_create(Class, [
+            Class(
+                name=f'{self.prefix} Class {i}',
+                grade=9 + i % 4,
+                section=chr(ord('A') + i % 26),
+                academic_year='2024-25'
+            )
+            for i in range(n_classes)
+        ])
+    
+    def create_subjects(self):
+        return self._bulk_create(Subject, [
+            Subject(name=f'{self.prefix} Subject {i}', code=f'{self.prefix}{i:03d}')
+            for i in range(self.n_subjects)
+        ])
+    
+    def create_students(self, classes):
+        """Create users, profiles and students batch by batch; return student ids in order"""
+        # One unusable password hash shared by every generated account
+        password = make_password(None)
+        birth_offsets = self.rng.integers(14 * 365, 19 * 365, self.n_students)
+        student_ids = np.empty(self.n_students, dtype=np.int64)
+        
+        for start in range(0, self.n_students, self.batch_size):
+            indexes = range(start, min(start + self.batch_size, self.n_students))
+            with transaction.atomic():
+                users = self._bulk_create(User, [
+                    User(
+                        username=f'{self.prefix.lower()}{i:07d}',
+                        first_name=f'Student{i}',
+                        last_name=self.prefix.title(),
+                        user_type='student',
+                        password=password
+                    )
+                    for i in indexes
+                ])
+                self._bulk_create(Profile, [
+                    Profile(
+                        user=user,
+                        date_of_birth=self.start_date - timedelta(days=int(birth_offsets[i]))
+                    )
+                    for i, user in zip(indexes, users)
+                ])
+                students = self._bulk_create(Student, [
+                    Student(
+                        user=user,
+                        roll_number=f'{self.prefix}{i:07d}',
+                        student_class=classes[i // self.students_per_class],
+                        admission_date=self.start_date - timedelta(days=365),
+                        parent_name=f'Parent {i}',
+                        parent_phone=f'+1555{i:07d}',
+                        address='Synthetic Address',
+                        enrollment_status=self.status[i]
+                    )
+                    for i, user in zip(indexes, users)
+                ])
+            student_ids[start:start + len(students)] = [student.id for student in students]
+        
+        return student_ids
+    
+    def create_attendance(self, subject_ids):
+        """One row per student, subject and school day, written a day at a time"""
+        n_subjects = len(subject_ids)
+        row_students = np.repeat(self.student_ids, n_subjects)
+        row_subjects = np.tile(subject_ids, self.n_students)
+        attended_below = np.repeat(self.attendance_rate, n_subjects)
+        present_below = np.repeat(self.attendance_rate * (1 - self.late_share), n_subjects)
+        created_at = timezone.now()
+        
+        for day in self.school_days:
+            rolls = self.rng.random(len(row_students))
+            statuses = np.where(
+                rolls >= attended_below, 'absent',
+                np.where(rolls >= present_below, 'late', 'present')
+            )
+            self._insert_rows(
+                Attendance,
+                ['student_id', 'subject_id', 'date', 'status', 'created_at', 'updated_at'],
+                (
+                    (int(student_id), int(subject_id), day, str(status), created_at, created_at)
+                    for student_id, subject_id, status in zip(row_students, row_subjects, statuses)
+                )
+            )
+    
+    def create_assessments(self, subjects):
+        """A quiz or assignment per subject every ten school days"""
+        school_days = self.school_days
+        n_assessments = max(1, len(school_days) // 10)
+        created_at = timezone.now()
+        
+        for i in range(n_assessments):
+            conducted = school_days[min(i * 10, len(school_days) - 1)] if school_days else self.start_date
+            assessment_type = 'quiz' if i % 2 == 0 else 'assignment'
+            marks = np.clip(
+                self.rng.normal(self.marks_mean[:, None], 12, (self.n_students, len(subjects))), 0, 100
+            ).astype(int)
+            
+            self._insert_rows(
+                Assessment,
+                ['student_id', 'subject_id', 'assessment_type', 'title', 'max_marks',
+                 'obtained_marks', 'date_conducted', 'created_at', 'updated_at'],
+                (
+                    (int(student_id), subject.id, assessment_type, f'{subject.code} {assessment_type.title()} {i + 1}',
+                     100, int(marks[row, column]), conducted, created_at, created_at)
+                    for row, student_id in enumerate(self.student_ids)
+                    for column, subject in enumerate(subjects)
+                )
+            )
+    
+    def create_fee_records(self):
+        """One fee per semester; riskier students are likelier to fall overdue"""
+        for semester in range(self.semesters):
+            due_date = self.start_date + timedelta(days=90 * semester)
+            overdue = self.rng.random(self.n_students) < self.fee_overdue_probability
+            paid_fraction = self.rng.uniform(0, 0.8, self.n_students)
+            
+            self._insert_rows(
+                FeeRecord,
+                ['student_id', 'academic_year', 'semester', 'total_amount', 'paid_amount',
+                 'due_date', 'payment_date', 'status'],
+                (
+                    (
+                        int(student_id), '2024-25', f'Semester {semester + 1}', FEE_AMOUNT,
+                        (FEE_AMOUNT * Decimal(str(round(paid_fraction[row], 2)))).quantize(Decimal('0.01'))
+                        if overdue[row] else FEE_AMOUNT,
+                        due_date,
+                        None if overdue[row] else due_date - timedelta(days=7),
+                        'overdue' if overdue[row] else 'paid'
+                    )
+                    for row, student_id in enumerate(self.student_ids)
+                )
+            )
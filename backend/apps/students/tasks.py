@@ -0,0 +1,90 @@
+from celery import shared_task
+from django.utils import timezone
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+from .models import UploadJob
+from .ingest import UploadIngestor
+from apps.analytics.dashboard import dashboard_snapshot
+
+JOB_PROGRESS_FIELDS = ['status', 'rows_processed', 'rows_written', 'error_count', 'errors', 'finished_at']
+
+@shared_task
+def ingest_upload(job_id):
+    """Ingest an uploaded file in the background, reporting progress per chunk"""
+    job = UploadJob.objects.get(job_id=job_id)
+    job.status = 'running'
+    job.save(update_fields=['status'])
+    broadcast_job_progress(job)
+    
+    def on_progress(summary):
+        _apply_summary(job, summary)
+        job.save(update_fields=JOB_PROGRESS_FIELDS)
+        broadcast_job_progress(job)
+    
+    try:
+        ingestor = UploadIngestor(job.data_type, on_progress=on_progress)
+        with job.file.open('rb') as file:
+            summary = ingestor.ingest(file, job.file.name)
+        
+        _apply_summary(job, summary)
+        job.status = 'completed'
+    
+    except Exception as e:
+        job.status = 'failed'
+        job.errors = list(job.errors) + [{'row': None, 'error': str(e)}]
+    
+    job.finished_at = timezone.now()
+    job.save(update_fields=JOB_PROGRESS_FIELDS)
+    broadcast_job_progress(job)
+    
+    # Attendance and marks trends on the dashboard include the new rows
+    dashboard_snapshot.invalidate()
+    
+    # The raw upload is no longer needed once its rows are in the database; a
+    # failed upload keeps its file so it can be inspected and retried
+    if job.status == 'completed':
+        job.file.delete(save=False)
+
+def _apply_summary(job, summary):
+    job.rows_processed = summary['rows_processed']
+    job.rows_written = summary['rows_written']
+    job.error_count = summary['error_count']
+    job.errors = summary['errors']
+
+def serialize_job(job):
+    return {
+        'job_id': str(job.job_id),
+        'data_type': job.data_type,
+        'status': job.status,
+        'rows_processed': job.rows_processed,
+        'rows_written': job.rows_written,
+        'error_count': job.error_count,
+        'errors': job.errors,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+def broadcast_job_progress(job):
+    """Push the job's progress to its upload group and the dashboard"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    
+    data = serialize_job(job)
+    
+    try:
+        async_to_sync(channel_layer.group_send)(
+            job.group_name,
+            {
+                "type": "upload_progress",
+                "data": data
+            }
+        )
+        async_to_sync(channel_layer.group_send)(
+            "dashboard_updates",
+            {
+                "type": "dashboard_update",
+                "data": {"action": "upload_progress", **data}
+            }
+        )
+    except Exception as e:
+        print(f"Error broadcasting upload progress for {job.job_id}: {e}")
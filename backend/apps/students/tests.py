@@ -89,4 +89,249 @@ class MLServiceTestCase(TestCase):
         # Test prediction (this would require a trained model)
         ml_service = MLService()
         # prediction = ml_service.predict_student_dropout(student)
-        # self.assertIn('dropout_probability', prediction)
\ No newline at end of file
+        # self.assertIn('dropout_probability', prediction)
+
+class UploadIngestorTestCase(TestCase):
+    def setUp(self):
+        from .models import Subject
+        
+        student_class = Class.objects.create(
+            name='Upload Class',
+            grade=10,
+            section='A',
+            academic_year='2024-25'
+        )
+        for i in range(3):
+            Student.objects.create(
+                user=User.objects.create_user(username=f'upload{i}', user_type='student'),
+                roll_number=f'UP{i:03d}',
+                student_class=student_class,
+                admission_date='2024-01-01',
+                parent_name='Test Parent',
+                parent_phone='+1234567890',
+                address='Test Address'
+            )
+        Subject.objects.create(name='Math', code='MATH')
+    
+    def test_attendance_upload_in_chunks(self):
+        from io import StringIO
+        from .ingest import UploadIngestor
+        from .models import Attendance
+        
+        csv = StringIO(
+            "roll_number,subject_code,date,status\n"
+            "UP000,MATH,2024-03-01,present\n"
+            "UP001,MATH,2024-03-01,absent\n"
+            "UP002,MATH,2024-03-01,late\n"
+            "UP999,MATH,2024-03-01,present\n"
+            "UP000,MATH,2024-03-01,absent\n"
+        )
+        
+        summary = UploadIngestor('attendance', chunk_size=2).ingest(csv, 'attendance.csv')
+        
+        self.assertEqual(summary['rows_processed'], 5)
+        self.assertEqual(summary['error_count'], 1)
+        self.assertEqual(summary['errors'][0]['row'], 5)
+        # Re-uploaded (student, subject, date) rows update the existing record
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(
+            Attendance.objects.get(student__roll_number='UP000').status,
+            'absent'
+        )
+    
+    def test_attendance_upload_maintains_rollups(self):
+        from io import StringIO
+        from .ingest import UploadIngestor
+        from .models import DailyAttendanceRollup, StudentAttendanceRollup
+        
+        csv = StringIO(
+            "roll_number,subject_code,date,status\n"
+            "UP000,MATH,2024-03-01,present\n"
+            "UP001,MATH,2024-03-01,absent\n"
+            "UP002,MATH,2024-03-01,late\n"
+            "UP000,MATH,2024-03-01,absent\n"
+        )
+        
+        UploadIngestor('attendance', chunk_size=3).ingest(csv, 'attendance.csv')
+        
+        daily = DailyAttendanceRollup.objects.get()
+        self.assertEqual((daily.present, daily.absent, daily.late), (0, 2, 1))
+        
+        rollup = StudentAttendanceRollup.objects.get(student__roll_number='UP000')
+        self.assertEqual(rollup.total_classes, 1)
+        self.assertEqual(rollup.absent, 1)
+        self.assertEqual(rollup.attendance_percentage, 0)
+    
+    def test_marks_reupload_updates_existing_rows(self):
+        from io import StringIO
+        from .ingest import UploadIngestor
+        from .models import Assessment
+        
+        header = "roll_number,subject_code,assessment_type,title,max_marks,obtained_marks,date\n"
+        UploadIngestor('marks').ingest(StringIO(
+            header +
+            "UP000,MATH,quiz,Quiz 1,100,40,2024-03-01\n"
+            "UP001,MATH,quiz,Quiz 1,100,70,2024-03-01\n"
+        ), 'marks.csv')
+        UploadIngestor('marks').ingest(StringIO(
+            header +
+            "UP000,MATH,quiz,Quiz 1,100,45,2024-03-01\n"
+        ), 'marks.csv')
+        
+        self.assertEqual(Assessment.objects.count(), 2)
+        self.assertEqual(
+            Assessment.objects.get(student__roll_number='UP000').obtained_marks,
+            45
+        )
+
+class UploadJobTaskTestCase(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        from .models import Subject
+        
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root,
+            CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        Student.objects.create(
+            user=User.objects.create_user(username='jobstudent', user_type='student'),
+            roll_number='JOB001',
+            student_class=Class.objects.create(
+                name='Job Class',
+                grade=10,
+                section='A',
+                academic_year='2024-25'
+            ),
+            admission_date='2024-01-01',
+            parent_name='Test Parent',
+            parent_phone='+1234567890',
+            address='Test Address'
+        )
+        Subject.objects.create(name='Math', code='MATH')
+        self.teacher = User.objects.create_user(username='jobteacher', user_type='teacher')
+    
+    def create_job(self, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import UploadJob
+        
+        return UploadJob.objects.create(
+            data_type='attendance',
+            file=SimpleUploadedFile('attendance.csv', content),
+            uploaded_by=self.teacher
+        )
+    
+    def receive_progress(self, channel_layer, channel):
+        """Drain the upload group's messages up to the job's final status"""
+        from asgiref.sync import async_to_sync
+        
+        statuses = []
+        while not statuses or statuses[-1] not in ('completed', 'failed'):
+            message = async_to_sync(channel_layer.receive)(channel)
+            self.assertEqual(message['type'], 'upload_progress')
+            statuses.append(message['data']['status'])
+        return statuses
+    
+    def test_ingest_upload_broadcasts_progress(self):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from .models import Attendance
+        from .tasks import ingest_upload
+        
+        job = self.create_job(
+            b"roll_number,subject_code,date,status\n"
+            b"JOB001,MATH,2024-03-01,present\n"
+        )
+        file_name = job.file.name
+        
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(job.group_name, channel)
+        
+        ingest_upload(str(job.job_id))
+        
+        self.assertEqual(self.receive_progress(channel_layer, channel), ['running', 'running', 'completed'])
+        job.refresh_from_db()
+        self.assertEqual(job.rows_written, 1)
+        self.assertEqual(Attendance.objects.count(), 1)
+        self.assertFalse(job.file.storage.exists(file_name))
+    
+    def test_failed_upload_keeps_its_file(self):
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from .tasks import ingest_upload
+        
+        job = self.create_job(b"roll_number,date\nJOB001,2024-03-01\n")
+        
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(job.group_name, channel)
+        
+        ingest_upload(str(job.job_id))
+        
+        self.assertEqual(self.receive_progress(channel_layer, channel), ['running', 'failed'])
+        job.refresh_from_db()
+        self.assertIn('Missing columns', job.errors[-1]['error'])
+        self.assertTrue(job.file.storage.exists(job.file.name))
+    
+    def test_upload_status_view(self):
+        import uuid
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        
+        try:
+            from .views import upload_status_view
+        except ImportError as e:
+            self.skipTest(f'Student views cannot be imported: {e}')
+        
+        job = self.create_job(b"roll_number,subject_code,date,status\n")
+        
+        def get_status(job_id):
+            request = APIRequestFactory().get(f'/api/students/upload/{job_id}/')
+            force_authenticate(request, user=self.teacher)
+            return upload_status_view(request, job_id=str(job_id))
+        
+        response = get_status(job.job_id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertEqual(get_status(uuid.uuid4()).status_code, status.HTTP_404_NOT_FOUND)
+
+class SyntheticInstitutionTestCase(TestCase):
+    def test_generated_outcomes_track_attendance(self):
+        from django.db.models import Count, Q
+        from .models import Attendance, FeeRecord
+        from .synthetic import SyntheticInstitution
+        
+        counts = SyntheticInstitution(students=200, subjects=2, days=10, seed=1, prefix='GENA').generate()
+        
+        self.assertEqual(counts['Student'], 200)
+        self.assertEqual(counts['Attendance'], 200 * 2 * 10)
+        self.assertEqual(FeeRecord.objects.count(), 200 * 2)
+        
+        rates = {}
+        for status in ['dropped_out', 'graduated']:
+            totals = Attendance.objects.filter(student__enrollment_status=status).aggregate(
+                total=Count('id'),
+                attended=Count('id', filter=~Q(status='absent'))
+            )
+            rates[status] = totals['attended'] / totals['total']
+        self.assertLess(rates['dropped_out'], rates['graduated'])
+    
+    def test_same_seed_reproduces_the_institution(self):
+        from .synthetic import SyntheticInstitution
+        
+        statuses = []
+        for prefix in ['GENB', 'GENC']:
+            SyntheticInstitution(students=50, subjects=2, days=5, seed=7, prefix=prefix).generate()
+            statuses.append(list(
+                Student.objects.filter(roll_number__startswith=prefix).order_by('roll_number').values_list(
+                    'enrollment_status', flat=True
+                )
+            ))
+        
+        self.assertEqual(statuses[0], statuses[1])
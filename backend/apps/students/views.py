@@ -4,18 +4,27 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Avg, Count
-from .models import Student, Attendance, Assessment, FeeRecord
+from django.core.exceptions import ValidationError
+from .models import Student, Attendance, Assessment, FeeRecord, UploadJob
 from .serializers import StudentSerializer, AttendanceSerializer, AssessmentSerializer
 from .permissions import IsTeacherOrAdmin
+from apps.core.pagination import LeanListMixin, StudentPagination
+from .ingest import REQUIRED_COLUMNS
+from .tasks import ingest_upload, serialize_job
 
-class StudentListView(generics.ListCreateAPIView):
-    queryset = Student.objects.all()
+class StudentListView(LeanListMixin, generics.ListCreateAPIView):
+    queryset = Student.objects.select_related('user', 'student_class')
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated, IsTeacherOrAdmin]
+    pagination_class = StudentPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['student_class', 'current_risk_level']
     search_fields = ['roll_number', 'user__first_name', 'user__last_name']
     ordering_fields = ['roll_number', 'risk_score', 'last_risk_update']
+    lean_fields = [
+        'id', 'roll_number', 'user__first_name', 'user__last_name', 'student_class_id',
+        'current_risk_level', 'risk_score', 'last_risk_update'
+    ]
 
 class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Student.objects.all()
@@ -40,38 +49,38 @@ def risk_summary_view(request):
 @permission_classes([IsAuthenticated, IsTeacherOrAdmin])
 def upload_data_view(request):
     """Handle bulk data upload (attendance, marks, fees)"""
-    import pandas as pd
-    from io import BytesIO
-    
     try:
         file = request.FILES['file']
         data_type = request.data.get('dataType')
         
-        # Read file
-        if file.name.endswith('.csv'):
-            df = pd.read_csv(file)
-        elif file.name.endswith('.xlsx'):
-            df = pd.read_excel(file)
-        else:
+        if data_type not in REQUIRED_COLUMNS:
             return Response(
-                {'error': 'Unsupported file format'},
+                {'error': 'Invalid data type'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Process based on data type
-        if data_type == 'attendance':
-            process_attendance_data(df)
-        elif data_type == 'marks':
-            process_marks_data(df)
-        elif data_type == 'fees':
-            process_fees_data(df)
-        else:
+        if not file.name.endswith(('.csv', '.xlsx')):
             return Response(
-                {'error': 'Invalid data type'},
+                {'error': 'Unsupported file format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        return Response({'message': 'Data uploaded successfully'})
+        # Hand the file to a Celery worker so the request returns immediately
+        job = UploadJob.objects.create(
+            data_type=data_type,
+            file=file,
+            uploaded_by=request.user
+        )
+        ingest_upload.delay(str(job.job_id))
+        
+        return Response(
+            {
+                'message': 'Upload queued for processing',
+                'job_id': str(job.job_id),
+                'status': job.status
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
         
     except Exception as e:
         return Response(
@@ -79,22 +88,16 @@ def upload_data_view(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-def process_attendance_data(df):
-    """Process attendance data from uploaded file"""
-    for _, row in df.iterrows():
-        try:
-            student = Student.objects.get(roll_number=row['roll_number'])
-            # Process attendance logic
-            # ... implementation details
-        except Student.DoesNotExist:
-            continue
-
-def process_marks_data(df):
-    """Process marks data from uploaded file"""
-    # Similar implementation for marks
-    pass
-
-def process_fees_data(df):
-    """Process fees data from uploaded file"""
-    # Similar implementation for fees
-    pass
\ No newline at end of file
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsTeacherOrAdmin])
+def upload_status_view(request, job_id):
+    """Get progress of a background upload job"""
+    try:
+        job = UploadJob.objects.get(job_id=job_id)
+    except (UploadJob.DoesNotExist, ValidationError):
+        return Response(
+            {'error': 'Upload job not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response(serialize_job(job))
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -55,6 +56,17 @@ DATABASES = {
 # Redis Configuration
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379')
 
+# Cache Configuration
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+}
+
+# Seconds a precomputed dashboard snapshot stays cached
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=900, cast=int)
+
 # Celery Configuration
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
@@ -62,6 +74,89 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+# Periodic tasks. Incremental analytics only see created and edited rows, so
+# a nightly full rebuild also picks up deleted attendance and assessments
+CELERY_BEAT_SCHEDULE = {
+    'update-student-analytics': {
+        'task': 'apps.analytics.tasks.update_student_analytics',
+        'schedule': config('ANALYTICS_UPDATE_INTERVAL', default=900, cast=int),
+    },
+    'rebuild-student-analytics': {
+        'task': 'apps.analytics.tasks.update_student_analytics',
+        'schedule': crontab(
+            hour=config('ANALYTICS_FULL_REBUILD_HOUR', default=2, cast=int), minute=0
+        ),
+        'kwargs': {'full': True},
+    },
+    # Sends coalesced notifications, quiet-period digests and retries as they
+    # come due; keep the interval below NOTIFICATION_COALESCE_WINDOW
+    'process-pending-notifications': {
+        'task': 'apps.notifications.tasks.process_pending_notifications',
+        'schedule': config('NOTIFICATION_PROCESS_INTERVAL', default=60, cast=int),
+    },
+    'ensure-prediction-partitions': {
+        'task': 'apps.analytics.tasks.ensure_prediction_partitions',
+        'schedule': crontab(day_of_month=1, hour=0, minute=30),
+    },
+}
+
+# ML Model Registry
+# Seconds between checks for a newly activated PredictionModel
+ML_MODEL_CHECK_INTERVAL = config('ML_MODEL_CHECK_INTERVAL', default=60, cast=int)
+# Model artifacts: joblib compression level (0 keeps them memory-mappable)
+# and the mmap mode used when loading them
+ML_MODEL_COMPRESS = config('ML_MODEL_COMPRESS', default=0, cast=int)
+ML_MODEL_MMAP_MODE = config('ML_MODEL_MMAP_MODE', default='r')
+# 'flat' scores tree ensembles from flattened NumPy node arrays,
+# 'sklearn' always calls the model's own predict_proba
+ML_INFERENCE_BACKEND = config('ML_INFERENCE_BACKEND', default='flat')
+# Contributing factors stored per prediction
+ML_EXPLANATION_TOP_K = config('ML_EXPLANATION_TOP_K', default=3, cast=int)
+# Worker processes for cross-validated training (-1 uses every core)
+ML_TRAINING_N_JOBS = config('ML_TRAINING_N_JOBS', default=-1, cast=int)
+# Rows fetched per server-side cursor round trip when building training sets
+TRAINING_CHUNK_SIZE = config('TRAINING_CHUNK_SIZE', default=2000, cast=int)
+# Directory holding dated feature snapshots
+FEATURE_STORE_DIR = config('FEATURE_STORE_DIR', default=os.path.join(BASE_DIR, 'feature_store'))
+# Seconds cached predictions live (Redis should use maxmemory-policy allkeys-lru)
+PREDICTION_CACHE_TIMEOUT = config('PREDICTION_CACHE_TIMEOUT', default=86400, cast=int)
+# Skip storing a new prediction when the risk level is unchanged and the
+# probability moved by no more than this
+PREDICTION_CHANGE_TOLERANCE = config('PREDICTION_CHANGE_TOLERANCE', default=0.01, cast=float)
+# Rows per bulk_create batch when writing DropoutPrediction results
+PREDICTION_WRITE_CHUNK_SIZE = config('PREDICTION_WRITE_CHUNK_SIZE', default=1000, cast=int)
+
+# Bulk Upload
+# Rows read and inserted per chunk when ingesting attendance, marks and fees
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=5000, cast=int)
+
+# SMS Notifications
+# 'twilio' sends for real, 'fake' records messages in-process
+SMS_PROVIDER = config('SMS_PROVIDER', default='twilio')
+TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', default='')
+TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', default='')
+TWILIO_PHONE_NUMBER = config('TWILIO_PHONE_NUMBER', default='')
+# Concurrent sends (and pooled HTTP connections) per dispatching worker
+SMS_DISPATCH_WORKERS = config('SMS_DISPATCH_WORKERS', default=16, cast=int)
+# Provider rate limit in messages per second, and the burst allowed above it
+SMS_RATE_PER_SECOND = config('SMS_RATE_PER_SECOND', default=10, cast=float)
+SMS_RATE_BURST = config('SMS_RATE_BURST', default=10, cast=int)
+# Notifications leased per claim, and how long a lease lasts before another
+# worker may take the batch over
+NOTIFICATION_CLAIM_BATCH_SIZE = config('NOTIFICATION_CLAIM_BATCH_SIZE', default=200, cast=int)
+NOTIFICATION_LEASE_SECONDS = config('NOTIFICATION_LEASE_SECONDS', default=300, cast=int)
+# Send attempts per notification; failed sends retry after NOTIFICATION_RETRY_BACKOFF
+# seconds, doubling each time
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=5, cast=int)
+NOTIFICATION_RETRY_BACKOFF = config('NOTIFICATION_RETRY_BACKOFF', default=60, cast=int)
+# Seconds an active notification template stays cached (saves invalidate it)
+NOTIFICATION_TEMPLATE_CACHE_TIMEOUT = config('NOTIFICATION_TEMPLATE_CACHE_TIMEOUT', default=3600, cast=int)
+# Seconds pending notifications wait so those to the same phone go out as one
+# digest, and seconds after a send before that phone is messaged again
+NOTIFICATION_COALESCE_WINDOW = config('NOTIFICATION_COALESCE_WINDOW', default=300, cast=int)
+NOTIFICATION_QUIET_PERIOD = config('NOTIFICATION_QUIET_PERIOD', default=3600, cast=int)
+# Days between attendance warnings for the same student
+NOTIFICATION_ATTENDANCE_ALERT_INTERVAL_DAYS = config('NOTIFICATION_ATTENDANCE_ALERT_INTERVAL_DAYS', default=7, cast=int)
 
 # REST Framework Configuration
 REST_FRAMEWORK = {